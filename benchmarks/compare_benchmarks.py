@@ -0,0 +1,38 @@
+"""
+Compare two benchmark result files written by run_benchmarks.py.
+
+    python benchmarks/compare_benchmarks.py old.json new.json
+"""
+import argparse
+import json
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old", help="results of the reference commit")
+    parser.add_argument("new", help="results of the commit to compare")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = {entry["name"]: entry for entry in json.load(f)["results"]}
+    with open(args.new) as f:
+        new = {entry["name"]: entry for entry in json.load(f)["results"]}
+
+    print(f'{"benchmark":<36}{"old [s]":>10}{"new [s]":>10}{"speedup":>10}{"memory":>10}')
+    for name, entry in new.items():
+        if name not in old or "error" in entry or "error" in old[name]:
+            continue
+        before = old[name]
+        speedup = float("inf")
+        if entry["wall_time"] > 0:
+            speedup = before["wall_time"] / entry["wall_time"]
+        memory = float("inf")
+        if before["peak_memory"] > 0:
+            memory = entry["peak_memory"] / before["peak_memory"]
+        print(f'{name:<36}{before["wall_time"]:>10.4f}{entry["wall_time"]:>10.4f}'
+              f'{speedup:>9.2f}x{memory:>9.2f}x')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Benchmarks of the symbolic pipeline.
+
+Covers the computation of vector field coefficients for orders 1-4 in 1-4 independent
+variables, for pure, mixed and Laplacian type multi-indices, get_monomials and output_to_latex
+on the heat and Cahn-Hilliard examples, and the D and clean utilities on synthetic expressions.
+Every benchmark records the wall time, the peak memory and the size of the result, and
+everything is written to a JSON file that can be compared between commits with
+compare_benchmarks.py.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import sympy as sym
+
+import prolongations as pr
+from prolongations.util.total_derivative import _function
+
+VARIABLE_NAMES = ["x", "y", "z", "t"]
+
+
+def measure(function) -> dict:
+    """
+    Run a benchmark once for the wall time and once under tracemalloc for the peak memory.
+
+    The function builds all its objects itself, and the sympy cache and the caches of
+    clean_base and the derivative functions are cleared before both runs, so the second run
+    does not profit from the first.
+    """
+    clear_caches()
+    start = time.perf_counter()
+    result = function()
+    wall_time = time.perf_counter() - start
+
+    clear_caches()
+    tracemalloc.start()
+    function()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"wall_time": wall_time, "peak_memory": peak_memory, **expression_size(result)}
+
+
+def clear_caches() -> None:
+    sym.core.cache.clear_cache()
+    pr.clean_base.cache_clear()
+    _function.cache_clear()
+
+
+def warm_up() -> None:
+    """
+    Run the heat example once before measuring, such that the first benchmark does not pay for
+    the lazy imports of prolongations and sympy.
+    """
+    prolongate, equation = heat_equation(1)
+    prolongate.output_to_latex(prolongate.determining_equations(equation).monomials)
+    phi = prolongate.compute_vector_field_coefficient([0, 0], 0)
+    pr.D(pr.clean(phi), prolongate.independent_variables[0])
+
+
+def expression_size(result) -> dict:
+    if isinstance(result, str):
+        return {"characters": len(result)}
+    if isinstance(result, dict):
+        values = list(result.values())
+        return {"entries": len(values), "count_ops": sum(sym.count_ops(v) for v in values)}
+    return {"terms": len(sym.Add.make_args(result)), "count_ops": sym.count_ops(result)}
+
+
+def prolongation_benchmarks(max_dimension: int, max_order: int) -> list:
+    results = []
+    for dimension in range(1, max_dimension + 1):
+        for order in range(1, max_order + 1):
+            for kind, derivatives in multi_indices(dimension, order).items():
+                def benchmark(derivatives=derivatives):
+                    variables = sym.symbols(VARIABLE_NAMES[-dimension:])
+                    u = sym.Function("u")(*variables)
+                    prolongate = pr.Prolongation(list(variables), [u])
+                    coefficients = prolongate.compute_vector_field_coefficients(derivatives, 0)
+                    return dict(zip(map(str, derivatives), coefficients))
+
+                name = f"phi_{dimension}d_order{order}" if kind == "pure" \
+                    else f"phi_{kind}_{dimension}d_order{order}"
+                results.append({"group": "prolongation", "name": name, "kind": kind,
+                                "dimension": dimension, "order": order,
+                                **measure(benchmark)})
+    return results
+
+
+def multi_indices(dimension: int, order: int) -> dict:
+    """
+    Derivatives benchmarked for a dimension and an order: the pure derivative in the first
+    variable, and in more than one dimension a mixed derivative spread evenly over the
+    variables, e.g. [0, 0, 1, 1], and the pure derivatives in every variable, as in the powers
+    of the Laplacian, which are relabelings of each other.
+    """
+    derivatives = {"pure": [[0] * order]}
+    if dimension > 1 and order > 1:
+        derivatives["mixed"] = [sorted(i % dimension for i in range(order))]
+    if dimension > 1:
+        derivatives["laplacian"] = [[i] * order for i in range(dimension)]
+    return derivatives
+
+
+def heat_equation(dimension: int):
+    variables = sym.symbols(VARIABLE_NAMES[-dimension - 1:])
+    u = sym.Function("u")(*variables)
+    prolongate = pr.Prolongation(list(variables), [u])
+    jet = prolongate.jet
+    u_t = jet.symbol([dimension], 0)
+    laplacian = sym.Add(*[jet.symbol([i, i], 0) for i in range(dimension)])
+    return prolongate, pr.Equation(sym.Eq(u_t, laplacian), jet)
+
+
+def cahn_hilliard():
+    x, t = sym.symbols("x t")
+    u = sym.Function("u")(x, t)
+    prolongate = pr.Prolongation([x, t], [u])
+    jet = prolongate.jet
+    u, u_t, u_x = jet.symbol([], 0), jet.symbol([1], 0), jet.symbol([0], 0)
+    u_xx, u_xxxx = jet.symbol([0, 0], 0), jet.symbol([0, 0, 0, 0], 0)
+    rhs = 24 * u * u_x**2 + 12 * u * 2 * u_xx - 12 * u_x**2 - 12 * u * u_xx + 2 * u_xx - u_xxxx
+    return prolongate, pr.Equation(sym.Eq(u_t, rhs), jet)
+
+
+def example_benchmarks(max_dimension: int) -> list:
+    examples = {f"heat_{dimension}d": (lambda d=dimension: heat_equation(d))
+                for dimension in range(1, max_dimension)}
+    examples["cahn_hilliard_1d"] = cahn_hilliard
+
+    results = []
+    for name, example in examples.items():
+        # The symmetry condition is prepared outside of the measurement
+        prolongate, equation = example()
+        condition = prolongate.determining_equations(equation).condition
+
+        def get_monomials():
+            fresh = pr.Prolongation(prolongate.independent_variables,
+                                    prolongate.dependent_variables)
+            return fresh.get_monomials(condition)
+
+        def output_to_latex():
+            return prolongate.output_to_latex(monomials)
+
+        monomials = prolongate.get_monomials(condition)
+        stages = [("get_monomials", get_monomials), ("output_to_latex", output_to_latex)]
+        for stage, benchmark in stages:
+            entry = {"group": stage, "name": f"{stage}_{name}"}
+            try:
+                entry.update(measure(benchmark))
+            except Exception as error:
+                entry["error"] = repr(error)
+            results.append(entry)
+    return results
+
+
+def utility_benchmarks(max_order: int) -> list:
+    x, t = sym.symbols("x t")
+    u = sym.Function("u")(x, t)
+    functions = [sym.Function(name)(x, t, u) for name in ("xi^x", "xi^t", "phi^u")]
+    u_x = sym.Function("u_x")(x, t)
+
+    # Synthetic expression: a sum of products of coefficient functions and derivatives,
+    # differentiated repeatedly
+    expr = sym.Add(*[f * u_x**k + f * u for k, f in enumerate(functions, start=1)])
+    results = []
+    for order in range(1, max_order + 1):
+        derivative = expr
+        for _ in range(order - 1):
+            derivative = pr.D(derivative, x)
+
+        results.append({"group": "D", "name": f"D_order{order}", "order": order,
+                        **measure(lambda e=derivative: pr.D(e, x))})
+        results.append({"group": "clean", "name": f"clean_order{order}", "order": order,
+                        **measure(lambda e=sym.expand(pr.D(derivative, t)): pr.clean(e))})
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="bench_output.json",
+                        help="JSON file to write the results to")
+    parser.add_argument("--max-dimension", type=int, default=4,
+                        help="largest number of independent variables")
+    parser.add_argument("--max-order", type=int, default=4, help="largest prolongation order")
+    parser.add_argument("--groups", nargs="*",
+                        default=["prolongation", "examples", "utilities"],
+                        help="benchmark groups to run")
+    args = parser.parse_args(argv)
+
+    warm_up()
+    results = []
+    if "prolongation" in args.groups:
+        results += prolongation_benchmarks(args.max_dimension, args.max_order)
+    if "examples" in args.groups:
+        results += example_benchmarks(args.max_dimension)
+    if "utilities" in args.groups:
+        results += utility_benchmarks(args.max_order)
+
+    output = {
+        "meta": {
+            "prolongations": pr.__version__,
+            "sympy": sym.__version__,
+            "python": platform.python_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+
+    for entry in results:
+        if "error" in entry:
+            print(f'{entry["name"]:<36} error: {entry["error"]}')
+        else:
+            memory = entry["peak_memory"] / 2**20
+            print(f'{entry["name"]:<36}{entry["wall_time"]:>10.4f} s{memory:>10.2f} MiB')
+
+
+if __name__ == "__main__":
+    main()
@@ -8,16 +8,17 @@ t = sym.symbols('t')
 u = sym.Function('u')(x,t)
 
 
-# Create symbolic derivatives in correct style
-u_t = sym.Function('u_t')(x,t)
-u_x = sym.Function('u_x')(x,t)
-u_xx = sym.Function('u_xx')(x,t)
-u_xxxx = sym.Function('u_xxxx')(x,t)
-
-
 # Create prolongation object
 prolongate = pr.Prolongation([x,t], [u])
 
+
+# Get the jet symbols of u and its derivatives
+u = prolongate.jet.symbol([], 0)
+u_t = prolongate.jet.symbol([1], 0)
+u_x = prolongate.jet.symbol([0], 0)
+u_xx = prolongate.jet.symbol([0,0], 0)
+u_xxxx = prolongate.jet.symbol([0,0,0,0], 0)
+
 # Compute the active coefficients in the prolongation applied to the heat equation
 phit = prolongate.compute_vector_field_coefficient([1], 0)
 phi = prolongate.phi[0]
@@ -25,10 +26,9 @@ phix = prolongate.compute_vector_field_coefficient([0], 0)
 phixx = prolongate.compute_vector_field_coefficient([0,0], 0)
 phixxxx = prolongate.compute_vector_field_coefficient([0,0,0,0], 0)
 
-d = sym.expand(phit-phi*(24*u_x**2+24*u*u_xx-12*u_xx)-phix*(48*u*u_x-24*u_x) - phixx*(12*u**2-12*u+2)+phixxxx)
-
-# Substitute the heat equation
-d = d.subs(u_t,24*u*u_x**2+12*u*2*u_xx-12*u_x**2-12*u*u_xx+2*u_xx-u_xxxx)
+# Substitute the Cahn-Hilliard equation and its differential consequences
+cahn_hilliard = pr.Equation(sym.Eq(u_t, 24*u*u_x**2+12*u*2*u_xx-12*u_x**2-12*u*u_xx+2*u_xx-u_xxxx), prolongate.jet)
+d = cahn_hilliard(phit-phi*(24*u_x**2+24*u*u_xx-12*u_xx)-phix*(48*u*u_x-24*u_x) - phixx*(12*u**2-12*u+2)+phixxxx)
 
 # Compute the monomials
 monomials = prolongate.get_monomials(d)
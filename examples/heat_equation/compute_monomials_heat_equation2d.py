@@ -11,19 +11,17 @@ u = sym.Function('u')(x, y, t)
 # Create prolongation object
 prolongate = pr.Prolongation([x, y, t], [u])
 
-# Compute the active coefficients in the prolongation applied to the heat equation
-phi_t = prolongate.compute_vector_field_coefficient([2], 0)
-phi_xx = prolongate.compute_vector_field_coefficient([0,0], 0)
-phi_yy = prolongate.compute_vector_field_coefficient([1,1], 0)
+# Define the heat equation in solved form
+u_t = prolongate.jet.symbol([2], 0)
+u_xx = prolongate.jet.symbol([0,0], 0)
+u_yy = prolongate.jet.symbol([1,1], 0)
+heat_equation = pr.Equation(sym.Eq(u_t, u_xx+u_yy), prolongate.jet)
 
-d = sym.expand(phi_t-phi_xx-phi_yy)
+# Compute the determining equations, only using the coefficients the equation needs
+determining_equations = prolongate.determining_equations(heat_equation)
+monomials = determining_equations.monomials
 
-# Substitute the heat equation
-d = d.subs(sym.Function("u_t")(x, y,t), sym.Function("u_xx")(x, y,t)+sym.Function("u_yy")(x, y,t))
-
-# Compute the monomials
-monomials = prolongate.get_monomials(d)
-
-# Print the monomials and the latex representation
+# Print the monomials, the latex representation and the time spent in every stage
 print(monomials)
-print(prolongate.output_to_latex(monomials))
\ No newline at end of file
+print(prolongate.output_to_latex(monomials))
+print(determining_equations.summary())
\ No newline at end of file
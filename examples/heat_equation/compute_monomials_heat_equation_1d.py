@@ -14,10 +14,11 @@ prolongate = pr.Prolongation([x,t], [u])
 phit = prolongate.compute_vector_field_coefficient([1], 0)
 phixx = prolongate.compute_vector_field_coefficient([0,0], 0)
 
-d = sym.expand(phit-phixx)
-
-# Substitute the heat equation
-d = d.subs(sym.Function("u_t")(x,t), sym.Function("u_xx")(x,t))
+# Substitute the heat equation and its differential consequences
+u_t = prolongate.jet.symbol([1], 0)
+u_xx = prolongate.jet.symbol([0,0], 0)
+heat_equation = pr.Equation(sym.Eq(u_t, u_xx), prolongate.jet)
+d = heat_equation(phit-phixx)
 
 # Compute the monomials
 monomials = prolongate.get_monomials(d)
@@ -12,20 +12,18 @@ u = sym.Function('u')(x, y, z, t)
 # Create prolongation object
 prolongate = pr.Prolongation([x, y, z, t], [u])
 
-# Compute the active coefficients in the prolongation applied to the heat equation
-phi_t = prolongate.compute_vector_field_coefficient([3], 0)
-phi_xx = prolongate.compute_vector_field_coefficient([0,0], 0)
-phi_yy = prolongate.compute_vector_field_coefficient([1,1], 0)
-phi_zz = prolongate.compute_vector_field_coefficient([2,2], 0)
-
-d = sym.expand(phi_t-phi_xx-phi_yy-phi_zz)
-
-# Substitute the heat equation
-d = d.subs(sym.Function("u_t")(x, y, z, t), sym.Function("u_xx")(x, y, z, t)+sym.Function("u_yy")(x, y, z, t))
-
-# Compute the monomials
-monomials = prolongate.get_monomials(d)
-
-# Print the monomials and the latex representation
+# Define the heat equation in solved form
+u_t = prolongate.jet.symbol([3], 0)
+u_xx = prolongate.jet.symbol([0,0], 0)
+u_yy = prolongate.jet.symbol([1,1], 0)
+u_zz = prolongate.jet.symbol([2,2], 0)
+heat_equation = pr.Equation(sym.Eq(u_t, u_xx+u_yy+u_zz), prolongate.jet)
+
+# Compute the determining equations, only using the coefficients the equation needs
+determining_equations = prolongate.determining_equations(heat_equation)
+monomials = determining_equations.monomials
+
+# Print the monomials, the latex representation and the time spent in every stage
 print(monomials)
-print(prolongate.output_to_latex(monomials))
\ No newline at end of file
+print(prolongate.output_to_latex(monomials))
+print(determining_equations.summary())
\ No newline at end of file
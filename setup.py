@@ -27,8 +27,12 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     install_requires=required,
+    entry_points={
+        "console_scripts": ["prolongations=prolongations.cli:main"],
+    },
     extras_require={
         "dev": required_dev,
+        "numeric": ["numpy"],
     },
     python_requires=">=3",
     url="https://github.com/EStorvik/Prolongations.git",
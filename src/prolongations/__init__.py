@@ -1,10 +1,48 @@
+"""
+Symbolic prolongations of vector fields.
 
+The submodules are only imported when one of their names is first accessed, e.g. pr.Prolongation, so importing the
+package itself does not pull in sympy.
+"""
+import importlib
 
-from prolongations.util.clean_derivatives import *
-from prolongations.util.total_derivative import *
+__version__ = "0.0.1"
 
-from prolongations.equation.equation import *
+# Public names and the submodules they live in
+_exports = {
+    "Recorder": "prolongations.util.instrumentation",
+    "instrumentation": "prolongations.util.instrumentation",
+    "instrument": "prolongations.util.instrumentation",
+    "expression_size": "prolongations.util.instrumentation",
+    "sort_derivatives": "prolongations.util.clean_derivatives",
+    "split_derivatives": "prolongations.util.clean_derivatives",
+    "clean_base": "prolongations.util.clean_derivatives",
+    "clean": "prolongations.util.clean_derivatives",
+    "D_base": "prolongations.util.total_derivative",
+    "D": "prolongations.util.total_derivative",
+    "DiskCache": "prolongations.util.disk_cache",
+    "Exporter": "prolongations.util.exporter",
+    "lambdify_coefficients": "prolongations.util.numeric",
+    "JetSpace": "prolongations.jet.jet_space",
+    "Equation": "prolongations.equation.equation",
+    "DeterminingEquations": "prolongations.prolongation.determining_equations",
+    "LazyDeterminingEquations": "prolongations.prolongation.lazy_determining_equations",
+    "MonomialEntry": "prolongations.prolongation.monomial_table",
+    "MonomialTable": "prolongations.prolongation.monomial_table",
+    "Prolongation": "prolongations.prolongation.prolongation",
+    "Solver": "prolongations.solver.solver",
+}
 
-from prolongations.prolongation.prolongation import *
+__all__ = list(_exports)
 
 
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,293 @@
+"""
+Command line driver for the determining equations of a PDE or a system of PDEs.
+
+The PDE is given in a JSON specification file, e.g.
+
+    {
+        "independent": ["x", "t"],
+        "dependent": ["u"],
+        "equations": ["u_t = u_xx"],
+        "order": 2
+    }
+
+where the equations are in solved form, with the derivatives written as the jet symbols u_x,
+u_xt, ... The prolongation order is optional and checked against the order of the equations.
+The vector field coefficients and the partially collected monomials are checkpointed
+in a DiskCache, so an interrupted run resumes where it stopped when it is started again with
+the same specification.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import sympy as sym
+
+import prolongations as pr
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="prolongations", description=__doc__.split("\n\n")[0].strip()
+    )
+    parser.add_argument("spec", help="JSON specification file of the PDE")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="file to write the determining equations to, defaults to stdout",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=pr.Exporter.formats,
+        default="srepr",
+        help="output format of the determining equations, pickle needs " "--output",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes for the coefficients and the "
+        "collection of the monomials",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="checkpoint database, defaults to the specification file with "
+        "the suffix .checkpoint",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=200,
+        help="number of summands of the symmetry condition collected between "
+        "two checkpoints",
+    )
+    parser.add_argument(
+        "--no-checkpoint", action="store_true", help="do not read or write checkpoints"
+    )
+    args = parser.parse_args(argv)
+    if args.format == "pickle" and not args.output:
+        parser.error("The pickle format needs --output")
+
+    # Report a bad specification before any work is done
+    try:
+        spec = _load_spec(args.spec)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    cache = None
+    if not args.no_checkpoint:
+        cache = pr.DiskCache(args.checkpoint or f"{args.spec}.checkpoint")
+
+    independent_variables = [sym.Symbol(x) for x in spec["independent"]]
+    dependent_variables = [
+        sym.Function(u)(*independent_variables) for u in spec["dependent"]
+    ]
+    prolongation = pr.Prolongation(
+        independent_variables, dependent_variables, cache=cache
+    )
+    try:
+        equations = [
+            _parse_equation(equation, prolongation.jet) for equation in _equations(spec)
+        ]
+        _check_order(spec, equations)
+    except ValueError as e:
+        if cache is not None:
+            cache.close()
+        parser.error(str(e))
+
+    workers = args.jobs if args.jobs > 1 else None
+    result = prolongation.lazy_determining_equations(
+        equations if len(equations) > 1 else equations[0], workers=workers
+    )
+
+    # Collect the monomials of every condition chunk by chunk, checkpointing every chunk, in
+    # one process pool for the whole run
+    start = time.perf_counter()
+    monomials = dict()
+    executor = None if workers is None else ProcessPoolExecutor(max_workers=workers)
+    try:
+        for k, condition in enumerate(result.conditions()):
+            key = None
+            if cache is not None:
+                key = cache.key("monomials", json.dumps(spec, sort_keys=True), k)
+            generators = prolongation.jet.generators(condition)
+            collected = _collect(
+                prolongation,
+                condition,
+                generators,
+                cache,
+                key,
+                args.checkpoint_every,
+                executor,
+            )
+            for exponents, coefficient in collected.items():
+                name = prolongation._monomial_name(generators, exponents)
+                monomials[(k, name) if len(equations) > 1 else name] = coefficient
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    result.add_stage("collection", time.perf_counter() - start, len(monomials))
+
+    start = time.perf_counter()
+    result.monomials = prolongation._remove_duplicates(monomials)
+    result.merged_monomials = prolongation.merged_monomials
+    result.add_stage(
+        "deduplication", time.perf_counter() - start, len(result.monomials)
+    )
+
+    if args.output:
+        with open(args.output, "wb" if args.format == "pickle" else "w") as output:
+            pr.Exporter(output, args.format, prolongation.jet).export(result.monomials)
+    else:
+        pr.Exporter(sys.stdout, args.format, prolongation.jet).export(result.monomials)
+
+    print(result.summary(), file=sys.stderr)
+    if cache is not None:
+        cache.close()
+    return 0
+
+
+def _load_spec(path: str) -> dict:
+    """
+    Read a specification file, raising a ValueError for missing or unknown keys.
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError("The specification is not a JSON object")
+    unknown = set(spec) - {"independent", "dependent", "equations", "equation", "order"}
+    if unknown:
+        raise ValueError(
+            f'Unknown keys in the specification: {", ".join(sorted(unknown))}'
+        )
+    for name in ("independent", "dependent"):
+        if not spec.get(name):
+            raise ValueError(f"The specification needs the {name} variables")
+    _equations(spec)
+    order = spec.get("order")
+    if order is not None and (not isinstance(order, int) or order < 1):
+        raise ValueError(f"The order {order!r} is not a positive integer")
+    return spec
+
+
+def _equations(spec: dict) -> list[str]:
+    equations = spec.get("equations", spec.get("equation"))
+    if not equations:
+        raise ValueError("The specification needs an equation")
+    return [equations] if isinstance(equations, str) else list(equations)
+
+
+def _check_order(spec: dict, equations: list[pr.Equation]) -> None:
+    """
+    Check the prolongation order of the specification against the order of the equations.
+    """
+    order = max(equation.order() for equation in equations)
+    if spec.get("order", order) != order:
+        raise ValueError(
+            f'The specification gives the order {spec["order"]}, but the equations are '
+            f"of order {order}"
+        )
+
+
+def _parse_equation(equation: str, jet: pr.JetSpace) -> pr.Equation:
+    """
+    Parse an equation in solved form such as 'u_t = u_xx + u*u_x' into an Equation on the jet
+    space. Raises a ValueError for an equation that is not of this form.
+    """
+    if equation.count("=") != 1:
+        raise ValueError(f"The equation {equation} is not in solved form")
+    lhs, rhs = equation.split("=")
+    names = dict()
+    for name in set(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", equation)):
+        symbol = _jet_symbol(name, jet)
+        if symbol is not None:
+            names[name] = symbol
+    for x in jet.independent_variables:
+        names[x.name] = x
+
+    lhs = sym.parse_expr(lhs, local_dict=names)
+    if lhs not in jet._jet_index:
+        raise ValueError(
+            f"The left hand side {lhs} is not a derivative of a dependent variable"
+        )
+    return pr.Equation(sym.Eq(lhs, sym.parse_expr(rhs, local_dict=names)), jet)
+
+
+def _jet_symbol(name: str, jet: pr.JetSpace) -> sym.Symbol | None:
+    """
+    The jet symbol with the given name, e.g. 'u' or 'u_xt', or None if the name is not one.
+    Raises a ValueError for a name like 'u_yy' that looks like a derivative of a dependent
+    variable, but not with respect to the independent variables, instead of reading it as a
+    constant.
+    """
+    derivative_like = False
+    for alpha, u in enumerate(jet.dependent_variables):
+        if name == u.name:
+            return jet.jet(alpha, (0,) * len(jet.independent_variables))
+        if name.startswith(f"{u.name}_"):
+            derivative_like = True
+            split = pr.split_derivatives(
+                [name[len(u.name) + 1 :]], jet.independent_variables
+            )
+            if all(x in jet._independent_index for x in map(sym.Symbol, split)):
+                derivative = [jet._independent_index[sym.Symbol(x)] for x in split]
+                return jet.symbol(derivative, alpha)
+    if derivative_like:
+        raise ValueError(
+            f"{name} is not a derivative with respect to the independent variables "
+            f'{", ".join(x.name for x in jet.independent_variables)}'
+        )
+    return None
+
+
+def _collect(
+    prolongation: pr.Prolongation,
+    condition,
+    generators: tuple,
+    cache: pr.DiskCache | None,
+    key: str | None,
+    chunksize: int,
+    executor: Executor | None,
+) -> dict:
+    """
+    Collect the monomials of a condition in chunks of summands, resuming from the checkpoint.
+
+    The monomials of every chunk are checkpointed on their own, followed by the number of
+    summands done so far, such that a checkpoint only writes the new chunk. The chunks are
+    folded once at the end.
+    """
+    summands = sym.Add.make_args(condition)
+    position, partials = 0, []
+    if cache is not None:
+        assert key is not None
+        progress = cache.get(key)
+        if progress is not None and progress[1:] == (len(summands), chunksize):
+            position = progress[0]
+            for i in range(-(-position // chunksize)):
+                partial, entries = cache.get(cache.key(key, i))
+                prolongation.jet.update(entries)
+                partials.append(partial)
+
+    while position < len(summands):
+        chunk = summands[position : position + chunksize]
+        if executor is not None:
+            partial = prolongation.collect_monomials(
+                sym.Add(*chunk), generators, executor=executor
+            )
+        else:
+            streamed = prolongation.stream_monomials(chunk, generators)
+            partial = prolongation.fold_monomials(streamed)
+        partials.append(partial)
+        position += len(chunk)
+
+        if cache is not None:
+            symbols = set().union(*[c.free_symbols for c in partial.values()])
+            entries = prolongation.jet.entries(symbols)
+            cache.set(cache.key(key, len(partials) - 1), (partial, entries))
+            cache.set(key, (position, len(summands), chunksize))
+    return prolongation.fold_monomials(partials)
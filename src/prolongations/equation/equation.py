@@ -1,12 +1,101 @@
-import prolongations as pr
 import sympy as sym
 
+import prolongations as pr
+from prolongations.util.instrumentation import instrument
 
 
 class Equation():
+    """
+    PDE in solved form u_J = RHS on a jet space.
+
+    Calling the equation on an expression substitutes the equation and the differential
+    consequences it needs. The consequences u_{J,K} = D_K RHS are generated through the cached
+    total derivative of the jet space, reduced such that they contain no derivatives of u_J,
+    and applied in one xreplace pass.
+    """
+    def __init__(self, equation: sym.Eq, jet: pr.JetSpace) -> None:
+        """
+        Initialize the Equation object
 
-    def __init__(self, equation: sym.Eq) -> None:
+        args:
+            equation: sym.Eq - the equation, with the jet symbol of the solved for derivative
+                u_J on the left hand side and a right hand side that contains no derivatives of
+                u_J
+            jet: pr.JetSpace - jet space the equation lives on
+
+        attributes:
+            equation: sym.Eq - the equation
+            jet: pr.JetSpace - jet space the equation lives on
+            dependent_variable_index: int - index of the dependent variable that is solved for
+        """
         self.equation = equation
+        self.jet = jet
+
+        self.dependent_variable_index, self._counts = jet.key(equation.lhs)
+        assert not any(self._is_principal(s) for s in equation.rhs.free_symbols), \
+            "The right hand side contains derivatives of the left hand side"
+
+        # Differential consequences, from the principal derivatives to their reduced right hand
+        # sides
+        self._rules: dict[sym.Symbol, sym.Expr] = {equation.lhs: equation.rhs}
+
+    @instrument("substitute", argument=1)
+    def __call__(self, expr):
+        """
+        Substitute the equation and its differential consequences into an expression.
+        """
+        mapping = {s: self.rule(s) for s in expr.free_symbols if self._is_principal(s)}
+        if mapping == {}:
+            return expr
+        return expr.xreplace(mapping)
+
+    def rule(self, symbol: sym.Symbol):
+        """
+        Right hand side of the differential consequence for a derivative u_{J,K} of the left
+        hand side u_J.
+        """
+        if symbol in self._rules:
+            return self._rules[symbol]
+
+        # Differentiate the rule of a parent u_{J,K-i} and reduce the result
+        _, counts = self.jet.key(symbol)
+        i = next(i for i, (c, c_J) in enumerate(zip(counts, self._counts)) if c > c_J)
+        parent_counts = counts[:i] + (counts[i] - 1,) + counts[i + 1:]
+        parent = self.jet.jet(self.dependent_variable_index, parent_counts)
+        rhs = self.jet.total_derivative(self.rule(parent), self.jet.independent_variables[i])
+        rhs = self(rhs)
+
+        self._rules[symbol] = rhs
+        return rhs
+
+    def rules(self, order: int) -> dict:
+        """
+        All differential consequences up to the given order.
+        """
+        n = len(self._counts)
+        rules = dict()
+        pending = [self._counts]
+        while pending:
+            counts = pending.pop()
+            symbol = self.jet.jet(self.dependent_variable_index, counts)
+            if symbol in rules or sum(counts) > order:
+                continue
+            rules[symbol] = self.rule(symbol)
+            pending.extend(counts[:i] + (counts[i] + 1,) + counts[i + 1:] for i in range(n))
+        return rules
+
+    def order(self) -> int:
+        """
+        Order of the equation.
+        """
+        return max([self.jet.order(s) for s in self.equation.free_symbols] + [0])
 
-    def __call__(self):
-        pass
\ No newline at end of file
+    def _is_principal(self, symbol: sym.Symbol) -> bool:
+        """
+        Check if a symbol is the left hand side u_J or one of its derivatives.
+        """
+        if self.jet.order(symbol) < 0:
+            return False
+        alpha, counts = self.jet.key(symbol)
+        return alpha == self.dependent_variable_index \
+            and all(c >= c_J for c, c_J in zip(counts, self._counts))
@@ -0,0 +1,322 @@
+import sympy as sym
+
+import prolongations as pr
+from prolongations.util.instrumentation import instrument
+
+
+class JetSpace:
+    """
+    Jet space of a set of independent and dependent variables.
+
+    Every derivative u_J of a dependent variable, and every partial derivative of a function on
+    the base space (x, u), such as the vector field coefficients xi and phi, is represented by
+    one interned sym.Symbol. The symbols are named after the usual convention (u_xxt, xi^x_xu),
+    but the names are only built once. Total derivatives are computed as index arithmetic on
+    the multi-index counts behind the symbols, so the results are always in canonical order.
+    """
+
+    def __init__(
+        self,
+        independent_variables: list[sym.Symbol],
+        dependent_variables: list[sym.Function],
+    ) -> None:
+        """
+        Initialize the JetSpace object
+
+        args:
+            independent_variables: list[sym.Symbol] - list of independent variables
+            dependent_variables: list[sym.Function] - list of dependent variables
+
+        attributes:
+            independent_variables: list[sym.Symbol] - list of independent variables
+            dependent_variables: list[sym.Function] - list of dependent variables
+        """
+        self.independent_variables = independent_variables
+        self.dependent_variables = dependent_variables
+
+        self._independent_index = {x: i for i, x in enumerate(independent_variables)}
+
+        # Derivatives of the dependent variables: (dependent variable index, counts) <-> symbol
+        self._jets: dict[tuple[int, tuple[int, ...]], sym.Symbol] = dict()
+        self._jet_index: dict[sym.Symbol, tuple[int, tuple[int, ...]]] = dict()
+
+        # Partial derivatives of functions on the base space: (function, counts) <-> symbol.
+        # The counts run over the independent variables followed by the dependent variables.
+        self._partials: dict[tuple[sym.Symbol, tuple[int, ...]], sym.Symbol] = dict()
+        self._partial_index: dict[sym.Symbol, tuple[sym.Symbol, tuple[int, ...]]] = (
+            dict()
+        )
+
+        # Total derivatives of single symbols, keyed on (symbol, independent variable index)
+        self._total_derivatives: dict[tuple[sym.Symbol, int], sym.Expr] = dict()
+
+        # Register the dependent variables themselves, such that sym.Symbol(u.name) is known as
+        # a jet symbol
+        for alpha in range(len(dependent_variables)):
+            self.jet(alpha, (0,) * len(independent_variables))
+
+    def symbol(
+        self, derivative: list[int], dependent_variable_index: int
+    ) -> sym.Symbol:
+        """
+        Get the jet symbol of a derivative of a dependent variable.
+
+        args:
+            derivative: list[int] - list of derivatives in index form. Uses index in the
+                self.independent_variables list.
+            dependent_variable_index: int - index of the dependent variable in the
+                self.dependent_variables list.
+        """
+        counts = [0] * len(self.independent_variables)
+        for i in derivative:
+            counts[i] += 1
+        return self.jet(dependent_variable_index, tuple(counts))
+
+    def jet(self, dependent_variable_index: int, counts: tuple[int, ...]) -> sym.Symbol:
+        """
+        Get the jet symbol of the dependent variable with the given derivative counts.
+        """
+        key = (dependent_variable_index, counts)
+        if key not in self._jets:
+            name = self.dependent_variables[dependent_variable_index].name
+            symbol = sym.Symbol(self._name(name, counts, self.independent_variables))
+            self._jets[key] = symbol
+            self._jet_index[symbol] = key
+        return self._jets[key]
+
+    def function(self, name: str) -> sym.Symbol:
+        """
+        Register a function on the base space (x, u), e.g. a vector field coefficient, and
+        return its symbol.
+        """
+        f = sym.Symbol(name)
+        counts = (0,) * (
+            len(self.independent_variables) + len(self.dependent_variables)
+        )
+        self._partials[(f, counts)] = f
+        self._partial_index[f] = (f, counts)
+        return f
+
+    def partial(self, f: sym.Symbol, counts: tuple[int, ...]) -> sym.Symbol:
+        """
+        Get the symbol of a partial derivative of a registered function.
+
+        args:
+            f: sym.Symbol - function registered through self.function
+            counts: tuple[int, ...] - number of derivatives with respect to every independent
+                and dependent variable
+        """
+        key = (f, counts)
+        if key not in self._partials:
+            variables = [*self.independent_variables, *self.dependent_variables]
+            symbol = sym.Symbol(self._name(f.name, counts, variables))
+            self._partials[key] = symbol
+            self._partial_index[symbol] = key
+        return self._partials[key]
+
+    def entries(self, symbols) -> list[tuple[sym.Symbol, tuple]]:
+        """
+        Table entries of the given symbols, so that another JetSpace of the same variables can
+        adopt them through update.
+
+        Symbols that are not in the table are skipped.
+        """
+        entries = []
+        for symbol in symbols:
+            if symbol in self._jet_index:
+                entries.append((symbol, self._jet_index[symbol]))
+            elif symbol in self._partial_index:
+                entries.append((symbol, self._partial_index[symbol]))
+        return entries
+
+    def update(self, entries: list[tuple[sym.Symbol, tuple]]) -> None:
+        """
+        Adopt table entries from another JetSpace of the same variables, see entries.
+        """
+        for symbol, key in entries:
+            if isinstance(key[0], int):
+                self._jets[key] = symbol
+                self._jet_index[symbol] = key
+            else:
+                self._partials[key] = symbol
+                self._partial_index[symbol] = key
+
+    def key(self, symbol: sym.Symbol) -> tuple[int, tuple[int, ...]]:
+        """
+        The dependent variable index and the derivative counts of a jet symbol.
+        """
+        return self._jet_index[symbol]
+
+    def partial_derivatives(self, functions: dict, symbols) -> dict:
+        """
+        Map the partial derivative symbols among the given symbols to the partial derivatives
+        of explicit functions.
+
+        args:
+            functions: dict - explicit expressions for registered functions, e.g. {xi^x: 2*t},
+                in the independent variables and the order zero jet symbols of the dependent
+                variables
+            symbols: iterable of sym.Symbol - the symbols to map, typically the free symbols of
+                the expressions that the result is substituted into with xreplace
+        """
+        variables = [
+            *self.independent_variables,
+            *[
+                self.jet(alpha, (0,) * len(self.independent_variables))
+                for alpha in range(len(self.dependent_variables))
+            ],
+        ]
+        mapping = dict()
+        for symbol in symbols:
+            if symbol in self._partial_index:
+                f, counts = self._partial_index[symbol]
+                if f in functions:
+                    derivative = functions[f]
+                    for v, c in zip(variables, counts):
+                        if c > 0:
+                            derivative = sym.diff(derivative, v, c)
+                    mapping[symbol] = derivative
+        return mapping
+
+    def order(self, symbol: sym.Symbol) -> int:
+        """
+        Order of a jet symbol, i.e. the number of derivatives of the dependent variable.
+        Returns -1 for other symbols.
+        """
+        if symbol in self._jet_index:
+            return sum(self._jet_index[symbol][1])
+        return -1
+
+    def generators(self, *exprs) -> tuple[sym.Symbol, ...]:
+        """
+        Jet symbols of order one or higher in one or more expressions, in canonical order.
+
+        These are the polynomial generators of the determining expression. They are sorted by
+        order, then dependent variable, then by the order of the independent variables, e.g.
+        u_x, u_t, u_xx, u_xt, u_tt.
+        """
+        symbols = set()
+        for expr in exprs:
+            symbols |= expr.free_symbols
+        generators = [s for s in symbols if self.order(s) > 0]
+        return tuple(sorted(generators, key=self.sort_key))
+
+    def parse_monomial(self, monomial: str) -> list[tuple[sym.Symbol, int]]:
+        """
+        Split a monomial name, e.g. 'u_x^2v_xt', into its jet symbols and their exponents.
+
+        The names are read as a dependent variable, optionally followed by '_' and independent
+        variables, and an optional exponent, matching the longest variable names first. Jet
+        symbols that are not in the table yet are created, so names written by another process
+        can be read back.
+        """
+
+        def longest_first(item):
+            return -len(item[1].name)
+
+        dependent = sorted(enumerate(self.dependent_variables), key=longest_first)
+        independent = sorted(enumerate(self.independent_variables), key=longest_first)
+        powers = []
+        position = 0
+        while position < len(monomial):
+            match = next(
+                (
+                    (alpha, u.name)
+                    for alpha, u in dependent
+                    if monomial.startswith(u.name, position)
+                ),
+                None,
+            )
+            if match is None:
+                raise ValueError(
+                    f"Unknown jet symbol in monomial {monomial} at position {position}"
+                )
+            alpha, name = match
+            position += len(name)
+
+            counts = [0] * len(self.independent_variables)
+            if monomial.startswith("_", position):
+                position += 1
+                while True:
+                    match = next(
+                        (
+                            (i, x.name)
+                            for i, x in independent
+                            if monomial.startswith(x.name, position)
+                        ),
+                        None,
+                    )
+                    if match is None:
+                        break
+                    counts[match[0]] += 1
+                    position += len(match[1])
+
+            exponent = ""
+            if monomial.startswith("^", position):
+                position += 1
+                while position < len(monomial) and monomial[position].isdigit():
+                    exponent += monomial[position]
+                    position += 1
+            powers.append(
+                (self.jet(alpha, tuple(counts)), int(exponent) if exponent else 1)
+            )
+        return powers
+
+    def sort_key(self, symbol: sym.Symbol) -> tuple:
+        """
+        Sort key of a jet symbol, see generators.
+        """
+        alpha, counts = self._jet_index[symbol]
+        return (sum(counts), alpha, tuple(-c for c in counts))
+
+    @instrument("total_derivative", argument=1)
+    def total_derivative(self, f, x: sym.Symbol):
+        """
+        Total derivative of an expression in jet symbols with respect to an independent
+        variable.
+        """
+        return pr.D(f, x, base=self._total_derivative_base)
+
+    def _total_derivative_base(self, f, x: sym.Symbol):
+        """
+        Total derivative of a single symbol, computed as index arithmetic on its multi-index
+        counts.
+        """
+        if not isinstance(f, sym.Symbol):
+            raise NotImplementedError(f"Function type {type(f)} not implemented")
+
+        i = self._independent_index[x]
+        key = (f, i)
+        if key in self._total_derivatives:
+            return self._total_derivatives[key]
+
+        if f in self._jet_index:
+            # D_i u_J = u_{J,i}
+            alpha, counts = self._jet_index[f]
+            Df_Dx = self.jet(alpha, self._increment(counts, i))
+        elif f in self._partial_index:
+            # D_i f = f_{x_i} + sum_alpha u^alpha_i f_{u^alpha}
+            g, counts = self._partial_index[f]
+            Df_Dx = self.partial(g, self._increment(counts, i))
+            n = len(self.independent_variables)
+            for alpha in range(len(self.dependent_variables)):
+                u_x = self.jet(alpha, self._increment((0,) * n, i))
+                Df_Dx += u_x * self.partial(g, self._increment(counts, n + alpha))
+        elif f == x:
+            Df_Dx = sym.Integer(1)
+        else:
+            # Other independent variables and parameters
+            Df_Dx = sym.Integer(0)
+
+        self._total_derivatives[key] = Df_Dx
+        return Df_Dx
+
+    @staticmethod
+    def _increment(counts: tuple[int, ...], i: int) -> tuple[int, ...]:
+        return counts[:i] + (counts[i] + 1,) + counts[i + 1 :]
+
+    @staticmethod
+    def _name(name: str, counts: tuple[int, ...], variables: list) -> str:
+        if not any(counts):
+            return name
+        return f"{name}_" + "".join(v.name * c for v, c in zip(variables, counts))
@@ -0,0 +1,49 @@
+class DeterminingEquations:
+    """
+    Result of the determining equation pipeline of a Prolongation.
+
+    Holds the deduplicated monomial dictionary together with the vector field coefficients that
+    were needed, and a timing and term count breakdown of every stage of the pipeline.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the DeterminingEquations object
+
+        attributes:
+            monomials: dict - monomial dictionary as returned by Prolongation.get_monomials
+            merged_monomials: dict - monomials removed as duplicates, keyed on the monomial
+                that was kept
+            coefficients: dict - the vector field coefficients used, keyed on the jet symbol
+                they belong to
+            condition: sym.Expr - the symmetry condition after substituting the equation
+            stages: list[tuple[str, float, int]] - name, time in seconds and number of terms
+                after every stage
+        """
+        self.monomials: dict = dict()
+        self.merged_monomials: dict = dict()
+        self.coefficients: dict = dict()
+        self.condition = None
+        self.stages: list[tuple[str, float, int]] = []
+
+    def add_stage(self, name: str, seconds: float, terms: int) -> None:
+        self.stages.append((name, seconds, terms))
+
+    def total_time(self) -> float:
+        return sum(seconds for _, seconds, _ in self.stages)
+
+    def summary(self) -> str:
+        """
+        Table of the time and the number of terms of every stage.
+        """
+        lines = [f'{"stage":<16}{"time [s]":>12}{"terms":>10}']
+        for name, seconds, terms in self.stages:
+            lines.append(f"{name:<16}{seconds:>12.4f}{terms:>10}")
+        lines.append(f'{"total":<16}{self.total_time():>12.4f}')
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return (
+            f"DeterminingEquations({len(self.monomials)} equations, "
+            f"{self.total_time():.4f} s)"
+        )
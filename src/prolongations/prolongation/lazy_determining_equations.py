@@ -0,0 +1,171 @@
+import sympy as sym
+
+import prolongations as pr
+
+
+class LazyDeterminingEquations(pr.DeterminingEquations):
+    """
+    Determining equations that are extracted from the symmetry condition on demand.
+
+    Returned by Prolongation.lazy_determining_equations. Nothing is expanded up front: the
+    coefficient of a monomial is extracted through Prolongation.coefficient_of when it is asked
+    for, and cached. Iterating goes through the monomials with the highest derivatives first,
+    such that the cheap determining equations come first.
+    """
+
+    def __init__(self, prolongation: pr.Prolongation) -> None:
+        """
+        Initialize the LazyDeterminingEquations object
+
+        args:
+            prolongation: pr.Prolongation - the prolongation the symmetry condition is computed
+                with
+
+        attributes:
+            prolongation: pr.Prolongation - the prolongation the symmetry condition is computed
+                with
+            monomials: dict - the nonzero coefficients extracted so far, keyed as in
+                Prolongation.determining_equations
+            see pr.DeterminingEquations for the other attributes
+        """
+        super().__init__()
+        self.prolongation = prolongation
+
+        # Generators and extracted coefficients, including the zero ones, of every condition
+        self._generators: dict[int, tuple[sym.Symbol, ...]] = dict()
+        self._extracted: dict[tuple[int, tuple[int, ...]], sym.Expr] = dict()
+
+    def conditions(self) -> list:
+        """
+        The symmetry condition of every equation.
+        """
+        return self.condition if isinstance(self.condition, list) else [self.condition]
+
+    def generators(self, k: int = 0) -> tuple[sym.Symbol, ...]:
+        """
+        The jet symbols the monomials of the k-th condition are made of.
+        """
+        if k not in self._generators:
+            self._generators[k] = self.prolongation.jet.generators(self.conditions()[k])
+        return self._generators[k]
+
+    def coefficient(self, monomial, k: int = 0):
+        """
+        Coefficient of a monomial in the k-th condition, see Prolongation.coefficient_of for
+        the forms of the monomial.
+        """
+        generators = self.generators(k)
+        powers = self.prolongation._monomial_powers(monomial, generators)
+        if not all(s in generators for s in powers):
+            return sym.S.Zero
+        exponents = tuple(powers.get(g, 0) for g in generators)
+
+        if (k, exponents) not in self._extracted:
+            condition = self.conditions()[k]
+            coefficient = self.prolongation.coefficient_of(
+                condition, exponents, generators
+            )
+            self._extracted[(k, exponents)] = coefficient
+            if coefficient != 0:
+                self.monomials[self._key(k, exponents)] = coefficient
+        return self._extracted[(k, exponents)]
+
+    def __getitem__(self, key):
+        """
+        Coefficient of a monomial, keyed as in Prolongation.determining_equations.
+        """
+        if isinstance(self.condition, list):
+            k, monomial = key
+            return self.coefficient(monomial, k)
+        return self.coefficient(key)
+
+    def support(self, k: int = 0) -> list[tuple[int, ...]]:
+        """
+        Exponent tuples of the monomials that can occur in the k-th condition, highest
+        derivatives first.
+
+        The support is read off the structure of the condition without expanding its
+        coefficients, so it may contain monomials whose coefficients cancel. They are sorted by
+        the highest order jet symbol, then by total order.
+        """
+        generators = self.generators(k)
+        position = {g: i for i, g in enumerate(generators)}
+        orders = [self.prolongation.jet.order(g) for g in generators]
+        support = _support(self.conditions()[k], position, dict())
+
+        def rank(exponents):
+            present = [order for order, exp in zip(orders, exponents) if exp > 0]
+            total = sum(order * exp for order, exp in zip(orders, exponents))
+            return (
+                -max(present, default=0),
+                -total,
+                tuple(-exp for exp in reversed(exponents)),
+            )
+
+        return sorted(support, key=rank)
+
+    def items(self):
+        """
+        Extract the nonzero coefficients one by one, highest derivatives first, yielding keys
+        and coefficients.
+        """
+        for k in range(len(self.conditions())):
+            for exponents in self.support(k):
+                coefficient = self.coefficient(exponents, k)
+                if coefficient != 0:
+                    yield self._key(k, exponents), coefficient
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def _key(self, k: int, exponents: tuple[int, ...]):
+        name = self.prolongation._monomial_name(self.generators(k), exponents)
+        return (k, name) if isinstance(self.condition, list) else name
+
+    def __repr__(self) -> str:
+        return (
+            f"LazyDeterminingEquations({len(self.monomials)} equations extracted, "
+            f"{self.total_time():.4f} s)"
+        )
+
+
+def _support(expr, position: dict, memo: dict) -> set:
+    """
+    Exponent tuples over the generators that can occur in the expansion of an expression.
+    """
+    if expr in memo:
+        return memo[expr]
+
+    zero = (0,) * len(position)
+    if expr in position:
+        exponents = [0] * len(position)
+        exponents[position[expr]] = 1
+        support = {tuple(exponents)}
+    elif not any(s in position for s in expr.free_symbols):
+        support = {zero}
+    elif isinstance(expr, sym.Add):
+        support = set().union(*[_support(arg, position, memo) for arg in expr.args])
+    elif isinstance(expr, sym.Mul):
+        support = {zero}
+        for arg in expr.args:
+            support = _add(support, _support(arg, position, memo))
+    elif isinstance(expr, sym.Pow) and expr.exp.is_Integer and expr.exp > 0:
+        base = _support(expr.base, position, memo)
+        support = {zero}
+        for _ in range(int(expr.exp)):
+            support = _add(support, base)
+    else:
+        raise NotImplementedError(
+            f"The expression is not polynomial in the jet symbols: {expr}"
+        )
+
+    memo[expr] = support
+    return support
+
+
+def _add(a: set, b: set) -> set:
+    """
+    Minkowski sum of two sets of exponent tuples.
+    """
+    return {tuple(i + j for i, j in zip(x, y)) for x in a for y in b}
@@ -0,0 +1,299 @@
+import sympy as sym
+
+import prolongations as pr
+
+
+class MonomialEntry:
+    """
+    Row of a MonomialTable: the index of the equation, the exponents over the generators and
+    the coefficient.
+    """
+
+    __slots__ = ("equation", "exponents", "coefficient")
+
+    def __init__(self, equation: int, exponents: tuple[int, ...], coefficient) -> None:
+        self.equation = equation
+        self.exponents = exponents
+        self.coefficient = coefficient
+
+    def __repr__(self) -> str:
+        return f"MonomialEntry({self.equation}, {self.exponents}, {self.coefficient})"
+
+
+class MonomialTable:
+    """
+    Compact table of monomials and their coefficients.
+
+    The monomials are stored as interned exponent tuples over one shared tuple of generators
+    instead of as strings, with one MonomialEntry per row. compact makes equal subexpressions
+    of all coefficients one shared object, or factors them out with sym.cse, such that the
+    shared combinations of partial derivatives of xi and phi are stored once. The table is read
+    like the monomial dictionaries of Prolongation.get_monomials, with the monomials as names,
+    or as (index of the equation, name) for systems, and the coefficients with the common
+    subexpressions substituted back.
+    """
+
+    def __init__(
+        self,
+        jet: pr.JetSpace,
+        generators: tuple[sym.Symbol, ...] = (),
+        system: bool = False,
+    ) -> None:
+        """
+        Initialize the MonomialTable object
+
+        args:
+            jet: pr.JetSpace - jet space of the generators
+            generators: tuple[sym.Symbol, ...] - the jet symbols the exponent tuples refer to
+            system: bool - whether the monomials are keyed on the index of the equation as well
+
+        attributes:
+            jet: pr.JetSpace - jet space of the generators
+            generators: tuple[sym.Symbol, ...] - the jet symbols the exponent tuples refer to,
+                in canonical order
+            system: bool - whether the monomials are keyed on the index of the equation as well
+            common: list[tuple[sym.Symbol, sym.Expr]] - common subexpressions factored out by
+                compact with the cse method, in the order of sym.cse
+        """
+        self.jet = jet
+        self.generators = tuple(sorted(generators, key=jet.sort_key))
+        self.system = system
+        self.common: list[tuple[sym.Symbol, sym.Expr]] = []
+
+        self._entries: dict[tuple[int, tuple[int, ...]], MonomialEntry] = dict()
+        self._exponents: dict[tuple[int, ...], tuple[int, ...]] = dict()
+
+    @classmethod
+    def from_collected(
+        cls,
+        jet: pr.JetSpace,
+        generators: tuple[sym.Symbol, ...],
+        collected: dict,
+        equation: int = 0,
+    ) -> "MonomialTable":
+        """
+        Table of a dictionary from exponent tuples to coefficients, e.g. from
+        Prolongation.collect_monomials. The monomials are keyed on the index of the equation
+        for every equation but the first one.
+        """
+        table = cls(jet, generators, system=equation != 0)
+        for exponents, coefficient in collected.items():
+            table.add(dict(zip(generators, exponents)), coefficient, equation)
+        return table
+
+    @classmethod
+    def from_monomials(cls, jet: pr.JetSpace, monomials) -> "MonomialTable":
+        """
+        Table of a monomial dictionary keyed by names, or of an iterable of (monomial,
+        coefficient) pairs, e.g. from get_monomials, determining_equations or pr.Exporter.load.
+        """
+        rows = []
+        generators: set = set()
+        system = False
+        pairs = monomials.items() if isinstance(monomials, dict) else monomials
+        for key, coefficient in pairs:
+            equation, name = key if isinstance(key, tuple) else (0, key)
+            system = system or isinstance(key, tuple)
+            powers = dict(jet.parse_monomial(name))
+            generators |= set(powers)
+            rows.append((equation, powers, coefficient))
+
+        table = cls(jet, tuple(generators), system)
+        for equation, powers, coefficient in rows:
+            table.add(powers, coefficient, equation)
+        return table
+
+    def add(self, powers: dict, coefficient, equation: int = 0) -> None:
+        """
+        Add a coefficient to the monomial with the given powers of the generators, dropping it
+        if it cancels.
+        """
+        for g in powers:
+            if g not in self.generators:
+                self._reindex(self.generators + (g,))
+        exponents = self._intern(tuple(powers.get(g, 0) for g in self.generators))
+        key = (equation, exponents)
+
+        if key in self._entries:
+            coefficient = self._entries[key].coefficient + coefficient
+            if coefficient == 0:
+                del self._entries[key]
+                return
+            self._entries[key].coefficient = coefficient
+        elif coefficient != 0:
+            self._entries[key] = MonomialEntry(equation, exponents, coefficient)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        for entry in self._entries.values():
+            yield self._key(entry)
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) in self._entries
+
+    def __getitem__(self, key):
+        """
+        Coefficient of a monomial given by its key as in the monomial dictionaries, or by
+        (equation, exponents).
+        """
+        return self._expand(self._entries[self._lookup(key)].coefficient)
+
+    def entries(self):
+        """
+        The rows of the table, with the coefficients in the compact form.
+        """
+        return iter(self._entries.values())
+
+    def items(self):
+        for entry in self._entries.values():
+            yield self._key(entry), self._expand(entry.coefficient)
+
+    def to_dict(self) -> dict:
+        """
+        The table as a monomial dictionary as returned by get_monomials.
+        """
+        return dict(self.items())
+
+    def merge(self, other: "MonomialTable") -> "MonomialTable":
+        """
+        New table with the coefficients of both tables added up monomial by monomial.
+        """
+        generators = tuple(set(self.generators) | set(other.generators))
+        table = MonomialTable(self.jet, generators, self.system or other.system)
+        for source in (self, other):
+            for entry in source._entries.values():
+                powers = {
+                    g: exp
+                    for g, exp in zip(source.generators, entry.exponents)
+                    if exp > 0
+                }
+                table.add(powers, source._expand(entry.coefficient), entry.equation)
+        return table
+
+    def filter(self, predicate) -> "MonomialTable":
+        """
+        New table with the rows for which predicate(key, coefficient) is true, with the keys as
+        in the monomial dictionaries. The compact form is kept.
+        """
+        table = MonomialTable(self.jet, self.generators, self.system)
+        table.common = self.common
+        table._exponents = dict(self._exponents)
+        for key, entry in self._entries.items():
+            if predicate(self._key(entry), self._expand(entry.coefficient)):
+                table._entries[key] = MonomialEntry(
+                    entry.equation, entry.exponents, entry.coefficient
+                )
+        return table
+
+    def order(self, entry: MonomialEntry) -> int:
+        """
+        Highest order of the jet symbols in the monomial of a row.
+        """
+        orders = [
+            self.jet.order(g)
+            for g, exp in zip(self.generators, entry.exponents)
+            if exp > 0
+        ]
+        return max(orders, default=0)
+
+    def compact(self, method: str = "share") -> "MonomialTable":
+        """
+        Store the coefficients in a compact form, in place.
+
+        args:
+            method: str - "share" hash-conses the coefficients, such that equal subexpressions
+                of all coefficients are one shared object, "cse" factors the common
+                subexpressions out with sym.cse into self.common
+        """
+        entries = list(self._entries.values())
+        coefficients = [self._expand(entry.coefficient) for entry in entries]
+        if method == "share":
+            nodes: dict = dict()
+            self.common = []
+            reduced = [_share(coefficient, nodes) for coefficient in coefficients]
+        elif method == "cse":
+            symbols = sym.numbered_symbols("_c", start=0)
+            self.common, reduced = sym.cse(coefficients, symbols=symbols, order="none")
+        else:
+            raise ValueError(f"Unknown compaction method {method}")
+        for entry, coefficient in zip(entries, reduced):
+            entry.coefficient = coefficient
+        return self
+
+    def export(self, file, format: str = "srepr") -> int:
+        """
+        Write the table with pr.Exporter, see there for the formats. Returns the number of rows
+        written.
+        """
+        return pr.Exporter(file, format, self.jet).export(self.items())
+
+    @classmethod
+    def load(cls, jet: pr.JetSpace, file, format: str = "srepr") -> "MonomialTable":
+        """
+        Read a table written by export or pr.Exporter.
+        """
+        return cls.from_monomials(jet, pr.Exporter.load(file, format))
+
+    def _expand(self, coefficient):
+        """
+        Substitute the common subexpressions back into a coefficient.
+        """
+        for symbol, expr in reversed(self.common):
+            if symbol in coefficient.free_symbols:
+                coefficient = coefficient.xreplace({symbol: expr})
+        return coefficient
+
+    def _key(self, entry: MonomialEntry):
+        name = pr.Prolongation._monomial_name(self.generators, entry.exponents)
+        return (entry.equation, name) if self.system else name
+
+    def _lookup(self, key) -> tuple[int, tuple[int, ...] | None]:
+        """
+        Internal key of a monomial given as a name, (equation, name) or (equation, exponents).
+        """
+        equation, monomial = key if isinstance(key, tuple) else (0, key)
+        if isinstance(monomial, str):
+            powers = dict(self.jet.parse_monomial(monomial))
+            if not all(g in self.generators for g in powers):
+                return (equation, None)
+            monomial = tuple(powers.get(g, 0) for g in self.generators)
+        return (equation, tuple(monomial))
+
+    def _intern(self, exponents: tuple[int, ...]) -> tuple[int, ...]:
+        return self._exponents.setdefault(exponents, exponents)
+
+    def _reindex(self, generators: tuple[sym.Symbol, ...]) -> None:
+        """
+        Change to a larger set of generators, rewriting the exponent tuples of all rows.
+        """
+        generators = tuple(sorted(generators, key=self.jet.sort_key))
+        position = [generators.index(g) for g in self.generators]
+        self._exponents = dict()
+        entries = dict()
+        for (equation, exponents), entry in self._entries.items():
+            new = [0] * len(generators)
+            for i, exp in zip(position, exponents):
+                new[i] = exp
+            entry.exponents = self._intern(tuple(new))
+            entries[(equation, entry.exponents)] = entry
+        self._entries = entries
+        self.generators = generators
+
+
+def _share(expr, nodes: dict):
+    """
+    Hash-cons an expression: rebuild it from the first seen instance of every equal
+    subexpression.
+    """
+    if expr in nodes:
+        return nodes[expr]
+    if expr.args:
+        args = tuple(_share(arg, nodes) for arg in expr.args)
+        if any(a is not b for a, b in zip(args, expr.args)):
+            if isinstance(expr, (sym.Add, sym.Mul)):
+                expr = expr.func(*args, evaluate=False)
+            else:
+                expr = expr.func(*args)
+    return nodes.setdefault(expr, expr)
@@ -1,7 +1,18 @@
-from future import __annotations__
-import prolongations as pr
+from __future__ import annotations
+
+import io
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
 import sympy as sym
 
+import prolongations as pr
+from prolongations.util.instrumentation import instrument
+
+# Expansion of the determining expressions, recorded as its own stage
+_expand = instrument("expand")(sym.expand)
+
+
 class Prolongation():
     """
     Prolongation class to compute vector field coefficients.
@@ -9,295 +20,896 @@ class Prolongation():
     Takes us to the prolongation of the given system of PDEs and computes the vector field coefficients. 
     There is still some manual work to be done in terms of translating the PDE, but this is WIP.
     """
-    def __init__(self, independent_variables: list[sym.Symbol], dependent_variables: list[sym.Function]) -> None:
+    def __init__(self, independent_variables: list[sym.Symbol],
+                 dependent_variables: list[sym.Function], simplify="expand",
+                 cache: pr.DiskCache | None = None, permutations: bool = True) -> None:
         """
         Initialize the Prolongation object
 
         args:
             independent_variables: list[sym.Symbol] - list of independent variables
             dependent_variables: list[sym.Function] - list of dependent variables
+            simplify: str | callable | None - simplification applied to every computed vector
+                field coefficient. One of None, "expand" (polynomial normal form, default),
+                "collect" (expand and collect in the jet variables), "simplify" (sym.simplify)
+                or a callable taking and returning an expression.
+            cache: pr.DiskCache | None - opt-in persistent cache of the computed vector field
+                coefficients. The coefficients are keyed on the variable names, the
+                simplification strategy and the multi-index, so it can not be combined with a
+                callable simplification strategy.
+            permutations: bool - compute only one coefficient per orbit of multi-indices under
+                permutations of the independent variables, e.g. phi_xx, and obtain the others,
+                e.g. phi_yy and phi_zz, by relabeling
 
         attributes:
             independent_variables: list[sym.Symbol] - list of independent variables
             dependent_variables: list[sym.Function] - list of dependent variables
-            xi: list[sym.Function] - list of xi functions
-            phi: list[sym.Function] - list of phi functions
+            jet: pr.JetSpace - jet space holding the symbols of all derivatives
+            xi: list[sym.Symbol] - list of xi functions
+            phi: list[sym.Symbol] - list of phi functions
+            merged_monomials: dict - monomials dropped by the last get_monomials call, keyed on
+                the monomial kept
+            simplify_timings: dict[str, float] - cumulative time in seconds spent in each
+                simplification strategy
+            cache: pr.DiskCache | None - persistent cache of the computed vector field
+                coefficients
+            permutations: bool - whether coefficients are obtained by relabeling their orbit
+                representative
 
         """
         self.independent_variables = independent_variables
         self.dependent_variables = dependent_variables
 
+        if not (simplify is None or callable(simplify)
+                or simplify in self._simplify_strategies):
+            raise ValueError(f'Unknown simplification strategy {simplify}')
+        if cache is not None and callable(simplify):
+            raise ValueError(
+                "A callable simplification strategy can not be cached, use a named one"
+            )
+        self.simplify = simplify
+        self.simplify_timings: dict[str, float] = dict()
+        self.cache = cache
+        self.permutations = permutations
+
+        self.jet = pr.JetSpace(independent_variables, dependent_variables)
+
         self.xi, self.phi = self._init_vector_field_coefficients()
 
+        # Cache of computed vector field coefficients, keyed on (dependent variable index,
+        # sorted multi-index)
+        self._coefficients: dict[tuple[int, tuple[int, ...]], sym.Expr] = dict()
+
+        self.merged_monomials: dict = dict()
 
-    def get_monomials(self, expr) -> dict:
+
+    @instrument("determining_equations", argument=1)
+    def determining_equations(self, equation: pr.Equation | list[pr.Equation],
+                              workers: int | None = None,
+                              expand: bool = False) -> pr.DeterminingEquations:
+        """
+        Computes the determining equations of the symmetries of a PDE or a system of PDEs.
+
+        Only the vector field coefficients phi^J of the derivatives u_J that appear in the
+        equations are computed, for all dependent variables at once. The symmetry condition
+        pr v(Delta) = xi^i dDelta/dx_i + phi^J dDelta/du_J is then formed for every equation,
+        the equations and their differential consequences are substituted, and the monomials
+        are collected and deduplicated.
+
+        args:
+            equation: pr.Equation | list[pr.Equation] - the PDE in solved form, or a system of
+                PDEs in solved form with pairwise distinct principal derivatives
+            workers: int | None - number of worker processes for computing coefficients and
+                collecting monomials
+            expand: bool - expand the coefficients before comparing them for duplicates
+
+        returns:
+            pr.DeterminingEquations - the monomials with a timing and term count breakdown of
+                every stage. For a system the monomials are keyed on (index of the equation,
+                monomial).
+        """
+        result = pr.DeterminingEquations()
+        system, conditions = self._symmetry_conditions(equation, workers, result)
+
+        # Collect the monomials, streaming the summands of the condition unless the expansion
+        # is split over workers
+        start = time.perf_counter()
+        monomials = dict()
+        for k, condition in enumerate(conditions):
+            generators = self.jet.generators(condition)
+            if workers is not None and workers > 1:
+                collected = self.collect_monomials(condition, generators, workers=workers)
+            else:
+                summands = sym.Add.make_args(condition)
+                collected = self.fold_monomials(self.stream_monomials(summands, generators))
+            for exponents, coefficient in collected.items():
+                name = self._monomial_name(generators, exponents)
+                monomials[(k, name) if system else name] = coefficient
+        result.add_stage("collection", time.perf_counter() - start, len(monomials))
+
+        # Remove duplicates
+        start = time.perf_counter()
+        result.monomials = self._remove_duplicates(monomials, expand)
+        result.merged_monomials = self.merged_monomials
+        result.add_stage("deduplication", time.perf_counter() - start, len(result.monomials))
+
+        return result
+
+    def _symmetry_conditions(self, equation: pr.Equation | list[pr.Equation],
+                             workers: int | None,
+                             result: pr.DeterminingEquations) -> tuple[bool, list]:
+        """
+        The prolongation, condition and substitution stages of determining_equations, recorded
+        in result. Returns whether a system was given and the symmetry condition of every
+        equation after the substitution.
+        """
+        system = isinstance(equation, (list, tuple))
+        equations = list(equation) if isinstance(equation, (list, tuple)) else [equation]
+        assert all(e.jet is self.jet for e in equations), \
+            "The equations have to be defined on the jet space of this Prolongation"
+        assert not any(e._is_principal(f.equation.lhs)
+                       for e in equations for f in equations if e is not f), \
+            "The principal derivatives of the equations overlap"
+        deltas = [e.equation.lhs - e.equation.rhs for e in equations]
+
+        # Compute the vector field coefficients of the derivatives in the equations
+        start = time.perf_counter()
+        symbols = set().union(*[delta.free_symbols for delta in deltas])
+        jets = sorted((s for s in symbols if self.jet.order(s) >= 0), key=self.jet.key)
+        result.coefficients = self.compute_system_coefficients(jets, workers=workers)
+        terms = sum(len(sym.Add.make_args(phi)) for phi in result.coefficients.values())
+        result.add_stage("prolongation", time.perf_counter() - start, terms)
+
+        # Apply the prolonged vector field to the equations
+        start = time.perf_counter()
+        conditions = []
+        for delta in deltas:
+            condition = sym.Add(*[xi * sym.diff(delta, x)
+                                  for xi, x in zip(self.xi, self.independent_variables)])
+            condition += sym.Add(*[phi * sym.diff(delta, u_J)
+                                   for u_J, phi in result.coefficients.items()])
+            conditions.append(condition)
+        result.add_stage("condition", time.perf_counter() - start,
+                         sum(len(sym.Add.make_args(c)) for c in conditions))
+
+        # Substitute the equations and their differential consequences
+        start = time.perf_counter()
+        conditions = [self._substitute(equations, condition) for condition in conditions]
+        result.condition = conditions if system else conditions[0]
+        result.add_stage("substitution", time.perf_counter() - start,
+                         sum(len(sym.Add.make_args(c)) for c in conditions))
+
+        return system, conditions
+
+    @instrument("lazy_determining_equations", argument=1)
+    def lazy_determining_equations(self, equation: pr.Equation | list[pr.Equation],
+                                   workers: int | None = None) -> pr.LazyDeterminingEquations:
+        """
+        Computes the symmetry condition of a PDE or a system of PDEs, without collecting the
+        determining equations.
+
+        Runs the prolongation, condition and substitution stages of determining_equations. The
+        coefficients of single monomials are then extracted on demand from the returned object,
+        e.g. the ones of the highest derivatives first, without expanding the whole condition.
+
+        args:
+            see determining_equations
+        """
+        result = pr.LazyDeterminingEquations(self)
+        self._symmetry_conditions(equation, workers, result)
+        return result
+
+    @instrument("get_monomials", argument=1)
+    def get_monomials(self, expr, expand: bool = False) -> dict:
         """
         Computes a disctionary of monomials and their coefficients from a given expression.
 
         Usefull for computing the vector field coefficients. This is the main important method.
+        The keys are the monomials written out as strings, e.g. 'u_x^2u_xx', and '' for the
+        terms without derivatives. With expand, the coefficients are expanded before they are
+        compared for duplicates.
         """
+        generators = self.jet.generators(expr)
 
-        # Init output dictionary
         monomials = dict()
+        for exponents, coefficient in self.collect_monomials(expr, generators).items():
+            monomials[self._monomial_name(generators, exponents)] = coefficient
 
-        # Simplify and expand the expression
-        expr = sym.expand(expr)
-
-        # get the terms of the expression
-        terms = expr.args
-
-        # Loop through all the terms and find the monomials
-        for term in terms:
-            # If it is a multiplication chech what is multiplied with a monomial
-            if isinstance(term, sym.Mul):
-                monomial_type =''
-                monomial_coefficient = 1
-                factors = term.args
-                for factor in factors:
-                    # Add integer factors to the coefficient
-                    if isinstance(factor, sym.Integer):
-                        monomial_coefficient *= factor
-                    elif isinstance(factor, sym.Function):
-                        # Add monomial factors to the monomial type
-                        if self._is_monomial(factor.name):
-                            monomial_type += factor.name
-                        # Otherwise, add to the coefficient
-                        else:
-                            monomial_coefficient *= factor
-                    # If power, check if monomial or coefficient and add to respective places
-                    elif isinstance(factor, sym.Pow):
-                        base, exp = factor.args
-                        if self._is_monomial(base.name):
-                            monomial_type += f'{base.name}^{exp}'
-                        else:
-                            monomial_coefficient *= factor
-                    else:
-                        raise NotImplementedError(f'Factor type {type(factor)} not implemented')
-                # Add the data to the dictionary
-                if monomial_type not in monomials:
-                    monomials[monomial_type] = monomial_coefficient
-                else:
-                    monomials[monomial_type] += monomial_coefficient
-
-            # Special case where it is just one term
-            elif isinstance(term, sym.Function):
-                if self._is_monomial(term.name):
-                    monomial_type = term.name
-                    monomial_coefficient = 1
-                    if monomial_type not in monomials:
-                        monomials[monomial_type] = monomial_coefficient
-                    else:
-                        monomials[monomial_type] += monomial_coefficient
-                else:
-                    if '' not in monomials:
-                        monomials[''] = term
-                    else:
-                        monomials[''] += term
-            else:
-                raise NotImplementedError(f'Term type {type(term)} not implemented')
-            
         # Remove duplicates
-        monomials = self._remove_duplicates(monomials)
-            
+        monomials = self._remove_duplicates(monomials, expand)
+
+        return monomials
+
+    @instrument("get_monomial_table", argument=1)
+    def get_monomial_table(self, expr, expand: bool = False) -> pr.MonomialTable:
+        """
+        Computes the monomials of an expression as a compact pr.MonomialTable.
+
+        The duplicates are removed as in get_monomials, also with expand, without writing out
+        the monomials as strings, and equal subexpressions of the coefficients are shared, see
+        pr.MonomialTable.compact.
+        """
+        generators = self.jet.generators(expr)
+        collected = self.collect_monomials(expr, generators)
+        table = pr.MonomialTable.from_collected(self.jet, generators, collected)
+
+        kept = self._unique_keys(table.items(), expand)
+        return table.filter(lambda key, coefficient: key in kept).compact()
+
+    @instrument("coefficient_of", argument=1)
+    def coefficient_of(self, expr, monomial, generators: tuple[sym.Symbol, ...] | None = None):
+        """
+        Computes the coefficient of a single monomial in the jet variables without expanding
+        the whole expression.
+
+        The expression is only expanded in the jet variables of the monomial, and only up to
+        their exponents in the monomial: products in which another jet variable or a higher
+        power occurs are dropped without being formed. Only the coefficient itself is expanded
+        in the end.
+
+        args:
+            expr: sym.Expr - expression that is polynomial in the derivatives of the dependent
+                variables
+            monomial: str | sym.Expr | tuple[int, ...] - the monomial as a name as in
+                get_monomials, e.g. 'u_x^2u_xx', as a product of jet symbols, or as an exponent
+                tuple over the generators
+            generators: tuple[sym.Symbol, ...] - the jet symbols the monomials are made of.
+                Defaults to self.jet.generators(expr).
+        """
+        if generators is None:
+            generators = self.jet.generators(expr)
+        powers = self._monomial_powers(monomial, generators)
+
+        # Index of every generator in the monomial, and -1 for the generators that must not
+        # occur
+        position = {g: -1 for g in generators}
+        position.update({s: k for k, s in enumerate(powers)})
+        bound = tuple(powers.values())
+        terms = _truncated_terms(sym.sympify(expr), position, bound, dict())
+        return _expand(terms.get(bound, sym.S.Zero))
+
+    def _monomial_powers(self, monomial, generators: tuple[sym.Symbol, ...]) -> dict:
+        """
+        The jet symbols of a monomial given in any of the forms of coefficient_of, with their
+        exponents.
+        """
+        if isinstance(monomial, str):
+            return dict(self.jet.parse_monomial(monomial))
+        if isinstance(monomial, tuple):
+            return {g: exp for g, exp in zip(generators, monomial) if exp > 0}
+        powers: dict = dict()
+        for factor in sym.Mul.make_args(sym.sympify(monomial)):
+            base, exp = factor.as_base_exp()
+            if base == 1:
+                continue
+            assert base in self.jet._jet_index and exp.is_Integer and exp > 0, \
+                f"{factor} is not a power of a jet symbol"
+            powers[base] = powers.get(base, 0) + int(exp)
+        return powers
+
+    @instrument("collect_monomials", argument=1)
+    def collect_monomials(self, expr, generators: tuple[sym.Symbol, ...] | None = None,
+                          workers: int | None = None, chunksize: int | None = None,
+                          executor: Executor | None = None) -> dict:
+        """
+        Computes a dictionary from exponent tuples to coefficients, treating the jet symbols as
+        polynomial generators.
+
+        The expression is expanded once and every term is sorted into its monomial in a single
+        pass. With workers, the terms are split into chunks that are sorted in a process pool,
+        and the partial dictionaries are reduced by key. No duplicates are removed.
+
+        args:
+            expr: sym.Expr - expression that is polynomial in the derivatives of the dependent
+                variables
+            generators: tuple[sym.Symbol, ...] - the jet symbols the exponent tuples refer to.
+                Defaults to self.jet.generators(expr).
+            workers: int | None - number of worker processes. None or 1 sorts the terms in this
+                process.
+            chunksize: int | None - number of terms per chunk. Defaults to four chunks per
+                worker.
+            executor: Executor | None - pool of the workers, e.g. to reuse one pool for many
+                calls. By default a process pool is started for the call.
+        """
+        if generators is None:
+            generators = self.jet.generators(expr)
+
+        terms = sym.Add.make_args(_expand(expr))
+        if executor is not None or (workers is not None and workers > 1):
+            if chunksize is None:
+                chunksize = max(1, -(-len(terms) // (4 * (workers or 1))))
+            chunks = [terms[k:k + chunksize] for k in range(0, len(terms), chunksize)]
+            repeated = [generators] * len(chunks)
+            if executor is not None:
+                partials = list(executor.map(_collect_terms, chunks, repeated))
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    partials = list(pool.map(_collect_terms, chunks, repeated))
+        else:
+            partials = [_collect_terms(terms, generators)]
+
+        # Reduce the partial dictionaries by key
+        collected: dict[tuple[int, ...], list] = dict()
+        for partial in partials:
+            for exponents, coefficient in partial.items():
+                collected.setdefault(exponents, []).append(coefficient)
+
+        monomials = dict()
+        for exponents, coefficients in collected.items():
+            coefficient = sym.Add(*coefficients)
+            if coefficient != 0:
+                monomials[exponents] = coefficient
         return monomials
 
+    def stream_monomials(self, summands, generators: tuple[sym.Symbol, ...] | None = None):
+        """
+        Collects the monomials of a sum one summand at a time.
+
+        Every summand is expanded on its own and its monomial dictionary, keyed by exponent
+        tuples as in collect_monomials, is yielded before the next one is expanded. Together
+        with fold_monomials this bounds the peak memory by the largest single summand, and the
+        partial dictionaries can be checkpointed.
 
-    # Check if function has the same name as (or is a derivative of) a monomial
-    def _is_monomial(self, name):
-        name_list = name.split('_')
-        for var in self.dependent_variables:
-            if name_list[0] == var.name:
-                return True
+        args:
+            summands: iterable of sym.Expr - the summands, e.g. the terms of an unexpanded
+                symmetry condition
+            generators: tuple[sym.Symbol, ...] - the jet symbols the exponent tuples refer to.
+                Defaults to the jet generators of all summands, which requires a second pass
+                over them.
+        """
+        if generators is None:
+            summands = list(summands)
+            generators = self.jet.generators(*summands)
+        for summand in summands:
+            yield self.collect_monomials(summand, generators)
+
+    @staticmethod
+    def fold_monomials(partials, monomials: dict | None = None) -> dict:
+        """
+        Folds partial monomial dictionaries into a running one, e.g. the output of
+        stream_monomials.
+
+        The coefficients are gathered per key and summed with a single sym.Add per key at the
+        end, instead of adding them up one partial dictionary at a time.
+
+        args:
+            partials: iterable of dict - monomial dictionaries keyed the same way
+            monomials: dict | None - running dictionary to fold into, updated in place.
+                Defaults to a new one.
+        """
+        if monomials is None:
+            monomials = dict()
+        terms: dict = dict()
+        for partial in partials:
+            for key, coefficient in partial.items():
+                terms.setdefault(key, []).append(coefficient)
+
+        for key, coefficients in terms.items():
+            coefficient = sym.Add(monomials.get(key, 0), *coefficients)
+            if coefficient == 0:
+                monomials.pop(key, None)
             else:
-                return False
+                monomials[key] = coefficient
+        return monomials
 
+    @staticmethod
+    def _monomial_name(generators: tuple[sym.Symbol, ...], exponents: tuple[int, ...]) -> str:
+        """
+        Write a monomial given as an exponent tuple as a string, e.g. 'u_x^2u_xx'.
+        """
+        name = ''
+        for g, exp in zip(generators, exponents):
+            if exp == 1:
+                name += g.name
+            elif exp > 1:
+                name += f'{g.name}^{exp}'
+        return name
+
+    def lambdify_monomials(self, monomials: dict, args: list | None = None) -> tuple:
+        """
+        Compile the coefficients of a monomial dictionary into one vectorized NumPy function.
+
+        The function evaluates all determining equations at once, with common subexpressions
+        shared between them, and returns an array of shape (len(monomials), number of points).
+        Needs numpy, which is installed with the numeric extra, pip install
+        prolongations[numeric].
 
+        args:
+            monomials: dict - monomial dictionary, e.g. from get_monomials
+            args: list | None - the arguments of the function. Defaults to the independent
+                variables and the dependent variables (as order zero jet symbols), followed by
+                the other symbols of the coefficients, such as the partial derivatives of xi
+                and phi, sorted by name.
+
+        returns:
+            tuple - the list of arguments and the function
+        """
+        coefficients = [sym.sympify(c) for c in monomials.values()]
+        if args is None:
+            args = self._base_coordinates()
+            symbols = set().union(*[c.free_symbols for c in coefficients]) - set(args)
+            args += sorted(symbols, key=lambda s: s.name)
+        return args, pr.lambdify_coefficients(coefficients, args)
+
+    def residual_function(self, monomials: dict, xi: list, phi: list):
+        """
+        Compile the residuals of the determining equations for a candidate vector field into a
+        NumPy function.
+
+        The partial derivatives of xi and phi are replaced by the derivatives of the candidate,
+        and the residuals are compiled as in lambdify_monomials. The function takes the
+        independent variables and the dependent variables as arrays of points and returns an
+        array of shape (len(monomials), number of points), which vanishes everywhere for a
+        symmetry. Needs numpy, see lambdify_monomials.
+
+        args:
+            monomials: dict - monomial dictionary, e.g. from get_monomials
+            xi: list - candidate xi, expressions in the independent variables and the order
+                zero jet symbols
+            phi: list - candidate phi, expressions in the independent variables and the order
+                zero jet symbols
+        """
+        coefficients = [sym.sympify(c) for c in monomials.values()]
+        functions = {**dict(zip(self.xi, xi)), **dict(zip(self.phi, phi))}
+        symbols = set().union(*[c.free_symbols for c in coefficients])
+        mapping = self.jet.partial_derivatives(functions, symbols)
+        residuals = [c.xreplace(mapping) for c in coefficients]
+        return pr.lambdify_coefficients(residuals, self._base_coordinates())
+
+    def _base_coordinates(self) -> list:
+        """
+        The independent variables and the dependent variables as order zero jet symbols.
+        """
+        dependent_variables = [self.jet.symbol([], alpha)
+                               for alpha in range(len(self.dependent_variables))]
+        return [*self.independent_variables, *dependent_variables]
 
+    @instrument("compute_vector_field_coefficient", argument=1)
     def compute_vector_field_coefficient(self, derivative: list[int], dependent_variable_index: int):
         """
         Computes the vector field coefficient for a given derivative list of derivatives and dependent variable index.
 
+        The coefficients are computed recursively through phi^{J,i} = D_i phi^J - sum_j D_i
+        xi^j u_{J,j}, and every coefficient on the way is cached, so lower order coefficients
+        are only computed once per Prolongation object.
+
         args:
             derivative: list[int] - list of derivatives in index form. Uses index in the self.independent_variables list.
             dependent_variable_index: int - index of the dependent variable in the self.dependent_variables list.
         """
-        assert len(self.dependent_variables)>dependent_variable_index; "The dependent variable index is out of range"
-
-        # Get the dependent variable
-        u: sym.Function = self.dependent_variables[dependent_variable_index]
-        
-        # Compute the vector field coefficient
-        body = self.phi[dependent_variable_index]
-        for i, x in enumerate(self.independent_variables):
-            body -= self.xi[i]*pr.D(u, x)
-        phi = pr.D(body,self.independent_variables[derivative[0]])
-        for i in range(1, len(derivative)):
-            phi = pr.D(phi, self.independent_variables[derivative[i]])
-        
-        u_dd = u
-        for i in derivative:
-            u_dd = pr.D(u_dd, self.independent_variables[i])
+        assert len(self.dependent_variables) > dependent_variable_index, \
+            "The dependent variable index is out of range"
+
+        # Derivatives commute, so the sorted multi-index identifies the coefficient
+        return self._coefficient(tuple(sorted(derivative)), dependent_variable_index)
+
+    @instrument("compute_vector_field_coefficients", argument=1)
+    def compute_vector_field_coefficients(self, derivatives: list[list[int]],
+                                          dependent_variable_index: int,
+                                          workers: int | None = None) -> list:
+        """
+        Computes the vector field coefficients for a list of derivatives, optionally spread
+        over a process pool.
+
+        The coefficients are scheduled order by order: all multi-indices of order k needed by
+        the requested ones are computed in parallel from their cached parents of order k - 1,
+        so shared lower order prefixes are computed once and before the coefficients that
+        depend on them. All results end up in the cache of this object.
+
+        args:
+            derivatives: list[list[int]] - list of derivatives in index form, see
+                compute_vector_field_coefficient.
+            dependent_variable_index: int - index of the dependent variable in the
+                self.dependent_variables list.
+            workers: int | None - number of worker processes. None or 1 computes everything in
+                this process. A callable simplify strategy has to be picklable to be used with
+                workers.
+        """
+        assert len(self.dependent_variables) > dependent_variable_index, \
+            "The dependent variable index is out of range"
+
+        keys = [(dependent_variable_index, tuple(sorted(derivative)))
+                for derivative in derivatives]
+        self._compute_levels(keys, workers)
+        return [self._coefficient(key, alpha) for alpha, key in keys]
+
+    @instrument("compute_system_coefficients", argument=1)
+    def compute_system_coefficients(self, jets: list[sym.Symbol],
+                                    workers: int | None = None) -> dict:
+        """
+        Computes the vector field coefficients phi^alpha_J of jet symbols u^alpha_J of any
+        dependent variables.
+
+        All coefficients are scheduled together, so with workers the coefficients of every
+        dependent variable share one process pool and one level by level schedule, see
+        compute_vector_field_coefficients.
 
-        for i, x in enumerate(self.independent_variables):
-            phi+=self.xi[i]*pr.D(u_dd, x)
+        args:
+            jets: list[sym.Symbol] - jet symbols, including the order zero symbols of the
+                dependent variables
+            workers: int | None - number of worker processes, see
+                compute_vector_field_coefficients
 
-        # Clean the expression
-        phi = sym.simplify(pr.clean(phi))
+        returns:
+            dict - the vector field coefficients, keyed on the jet symbols
+        """
+        keys = []
+        for u_J in jets:
+            alpha, counts = self.jet.key(u_J)
+            keys.append((alpha, tuple(i for i, c in enumerate(counts) for _ in range(c))))
+        self._compute_levels(keys, workers)
+        return {u_J: self._coefficient(key, alpha) for u_J, (alpha, key) in zip(jets, keys)}
+
+    def _compute_levels(self, keys: list[tuple[int, tuple[int, ...]]],
+                        workers: int | None) -> None:
+        """
+        Compute the coefficients of (dependent variable index, sorted multi-index) keys order
+        by order in a process pool, storing them in the cache. Does nothing without workers,
+        the coefficients are then computed on lookup.
+        """
+        if workers is None or workers <= 1:
+            return
+        # The coefficients are computed from the representatives of their orbits, whose
+        # prefixes are representatives again and form the chain of parents
+        representatives = {(alpha, self._representative(key)[0]) for alpha, key in keys}
+        order = max((len(key) for _, key in keys), default=0)
+        initargs = (self.independent_variables, self.dependent_variables, self.simplify,
+                    self.permutations)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=initargs) as executor:
+            for k in range(1, order + 1):
+                # The prefixes of order k that are not computed yet
+                prefixes = {(alpha, key[:k]) for alpha, key in representatives
+                            if len(key) >= k}
+                level = sorted(key for key in prefixes if not self._load(key))
+                tasks = []
+                for alpha, key in level:
+                    parent = self._coefficient(key[:-1], alpha)
+                    entries = self.jet.entries(parent.free_symbols)
+                    tasks.append((parent, entries, key, alpha))
+                results = executor.map(_compute_step, tasks)
+                for (alpha, key), (phi, entries, timings) in zip(level, results):
+                    self.jet.update(entries)
+                    self._store((alpha, key), phi)
+                    for name, seconds in timings.items():
+                        self.simplify_timings[name] = \
+                            self.simplify_timings.get(name, 0.0) + seconds
+
+    @staticmethod
+    def _substitute(equations: list[pr.Equation], expr):
+        """
+        Substitute a system of equations and their differential consequences into an
+        expression.
+
+        The right hand side of one equation may contain principal derivatives of another one,
+        so the equations are applied in turn until no principal derivatives are left. This
+        takes at most one round per equation, unless the right hand sides depend on each other
+        in a cycle.
+        """
+        for _ in range(len(equations)):
+            for equation in equations:
+                expr = equation(expr)
+            if not any(e._is_principal(s) for s in expr.free_symbols for e in equations):
+                return expr
+        raise ValueError(
+            "The right hand sides of the equations contain each others principal derivatives "
+            "in a cycle"
+        )
+
+    def _coefficient(self, derivative: tuple[int, ...], dependent_variable_index: int):
+        """
+        Look up the vector field coefficient for a sorted multi-index, computing it from its
+        parent if needed.
+        """
+        key = (dependent_variable_index, derivative)
+        if self._load(key):
+            return self._coefficients[key]
+
+        representative, order = self._representative(derivative)
+        if len(derivative) == 0:
+            phi = self.phi[dependent_variable_index]
+        elif representative != derivative:
+            # Relabel the coefficient of the representative of the orbit
+            phi = self._coefficient(representative, dependent_variable_index)
+            phi = self._relabel(phi, order)
+        else:
+            # phi^{J,i} = D_i phi^J - sum_j D_i xi^j u_{J,j}
+            x = self.independent_variables[derivative[-1]]
+            parent = self._coefficient(derivative[:-1], dependent_variable_index)
+            phi = self.jet.total_derivative(parent, x)
+            u_J = self.jet.symbol(derivative[:-1], dependent_variable_index)
+            for j, x_j in enumerate(self.independent_variables):
+                phi -= self.jet.total_derivative(self.xi[j], x) \
+                    * self.jet.total_derivative(u_J, x_j)
+
+            phi = self._simplify(phi)
+
+        self._store(key, phi)
         return phi
-        
-        
+
+    def _representative(self, derivative: tuple[int, ...]) -> tuple:
+        """
+        Representative of the orbit of a sorted multi-index under permutations of the
+        independent variables.
+
+        The variables are ordered by their number of derivatives, most first, with ties broken
+        by index, and renamed to the first variables in that order. Returns the sorted
+        multi-index of the representative and the order, such that variable r of the
+        representative is variable order[r] of the multi-index.
+        """
+        n = len(self.independent_variables)
+        if not self.permutations:
+            return derivative, tuple(range(n))
+        counts = [0] * n
+        for i in derivative:
+            counts[i] += 1
+        order = tuple(sorted(range(n), key=lambda i: (-counts[i], i)))
+        representative = tuple(r for r, i in enumerate(order) for _ in range(counts[i]))
+        return representative, order
+
+    def _relabel(self, expr, order: tuple[int, ...]):
+        """
+        Rename the independent variable r to the variable order[r] in an expression on the jet
+        space.
+
+        Renames the independent variables, the derivatives in the jet symbols and the partial
+        derivatives of xi and phi, together with the xi themselves, in one xreplace.
+        """
+        n = len(self.independent_variables)
+        xi_index = {xi: i for i, xi in enumerate(self.xi)}
+
+        def permute(counts):
+            permuted = list(counts)
+            for r, i in enumerate(order):
+                permuted[i] = counts[r]
+            return tuple(permuted)
+
+        mapping = dict()
+        for s in expr.free_symbols:
+            if s in self.jet._jet_index:
+                alpha, counts = self.jet.key(s)
+                mapping[s] = self.jet.jet(alpha, permute(counts))
+            elif s in self.jet._partial_index:
+                f, counts = self.jet._partial_index[s]
+                if f in xi_index:
+                    f = self.xi[order[xi_index[f]]]
+                mapping[s] = self.jet.partial(f, permute(counts[:n]) + counts[n:])
+            elif s in self.jet._independent_index:
+                mapping[s] = self.independent_variables[order[self.jet._independent_index[s]]]
+        return expr.xreplace(mapping)
+
+    def _load(self, key: tuple[int, tuple[int, ...]]) -> bool:
+        """
+        Check whether a coefficient is cached, loading it from the disk cache into memory if
+        needed.
+        """
+        if key in self._coefficients:
+            return True
+        if self.cache is None:
+            return False
+        entry = self.cache.get(self._cache_key(key))
+        if entry is None:
+            return False
+        phi, entries = entry
+        self.jet.update(entries)
+        self._coefficients[key] = phi
+        return True
+
+    def _store(self, key: tuple[int, tuple[int, ...]], phi) -> None:
+        """
+        Cache a computed coefficient in memory and, if enabled, on disk.
+        """
+        self._coefficients[key] = phi
+        if self.cache is not None:
+            self.cache.set(self._cache_key(key), (phi, self.jet.entries(phi.free_symbols)))
+
+    def _cache_key(self, key: tuple[int, tuple[int, ...]]) -> str:
+        assert self.cache is not None
+        return self.cache.key(
+            [x.name for x in self.independent_variables],
+            [u.name for u in self.dependent_variables], self.simplify, key
+        )
+
+    _simplify_strategies = ("expand", "collect", "simplify")
+
+    @instrument("simplify", argument=1)
+    def _simplify(self, expr):
+        """
+        Simplify an expression with the chosen strategy and record the time spent.
+        """
+        start = time.perf_counter()
+        if self.simplify is None:
+            name = "none"
+        elif callable(self.simplify):
+            name = getattr(self.simplify, "__name__", "custom")
+            expr = self.simplify(expr)
+        elif self.simplify == "expand":
+            name = "expand"
+            expr = sym.expand(expr)
+        elif self.simplify == "collect":
+            name = "collect"
+            expr = sym.expand(expr)
+            expr = sym.collect(expr, self.jet.generators(expr))
+        else:
+            name = "simplify"
+            expr = sym.simplify(expr)
+        seconds = time.perf_counter() - start
+        self.simplify_timings[name] = self.simplify_timings.get(name, 0.0) + seconds
+        return expr
 
     def _init_vector_field_coefficients(self) -> tuple:
         """
-        Initialize the xi and phi functions.
+        Initialize the xi and phi functions as functions on the jet space.
         """
         xi = []
         phi = []
         for x in self.independent_variables:
-            xi.append(sym.Function(f'xi^{x.name}')(*self.independent_variables, *self.dependent_variables))
+            xi.append(self.jet.function(f'xi^{x.name}'))
         for u in self.dependent_variables:
-            phi.append(sym.Function(f'phi^{u.name}')(*self.independent_variables, *self.dependent_variables))
+            phi.append(self.jet.function(f'phi^{u.name}'))
         return xi, phi
-    
+
     def output_to_latex(self, monomials: dict) -> str:
         """
         Output monomial dictionary to latex table.
+
+        For large tables, write the rows directly to a file with pr.Exporter instead.
+        """
+        output = io.StringIO()
+        pr.Exporter(output, "latex", self.jet).export(monomials)
+        return output.getvalue()
+
+    # Method to remove duplicate entries in monomial dictionary
+    def _remove_duplicates(self, monomials: dict, expand: bool = False) -> dict:
         """
+        Remove duplicate entries in the monomial dictionary.
 
-        # Create the table header
-        output = "\\begin{table}[] \n \centering \n \\begin{tabular}{c|c} \n monomial & coefficient\\\\ \n \hline \n"
+        Coefficients that agree up to sign and a constant factor give the same determining
+        equation, so only the first monomial with a given coefficient is kept. The dropped
+        monomials are recorded in self.merged_monomials, keyed on the monomial that was kept.
 
-        # Loop through the monomials and add them to the table
-        for monomial, coefficient in monomials.items():
-            coefficient = self._prepare_coefficient(coefficient)
-            if monomial == '':
-                output += f'$1$ & ${coefficient}$ \\\\ \n'
+        args:
+            monomials: dict - monomial dictionary
+            expand: bool - expand the coefficients before comparing them
+        """
+        kept = self._unique_keys(monomials.items(), expand)
+        return {key: value for key, value in monomials.items() if key in kept}
+
+    def _unique_keys(self, items, expand: bool = False) -> set:
+        """
+        Keys of the first monomial of every canonical coefficient among (key, coefficient)
+        pairs. The other keys are recorded in self.merged_monomials, keyed on the monomial that
+        was kept.
+        """
+        merged_monomials: dict = dict()
+
+        # Hash index from canonical coefficient to the monomial that was kept
+        index: dict = dict()
+        for key, value in items:
+            canonical = self._canonical_coefficient(value, expand)
+            if canonical in index:
+                merged_monomials.setdefault(index[canonical], []).append(key)
             else:
-                monomial = self._prepare_monomial(monomial)
-                output += f'${monomial}$ & ${coefficient}$ \\\\ \n'
-        
-        # Close the table
-        output += "\end{tabular}\n \caption{Caption}\n \label{tab:label}\n \end{table}"
-        return output
-
-    def _prepare_monomial(self, monomial: str) -> str:
-        """
-        Prepare the monomial for latex output.
-        """
-        monomial_list = monomial.split("_")
-        out_monomial = f"{monomial_list[0]}_"+"{"
-        for m in monomial_list[1:]:
-            for t in m:
-                if self._is_dependent(t):
-                    out_monomial += "}"+f"{t}_"+"{"
-                elif t == '^':
-                    out_monomial += "}^{"
-                else:
-                    out_monomial += f"{t}"
-
-        out_monomial += "}"
-        return out_monomial
-
-    def _is_dependent(self, t: str) -> bool:
-        """
-        Check if the given variable is dependent.
-        """
-        for var in self.dependent_variables:
-            if t == var.name:
-                return True
-        return False
-    
-    def _prepare_coefficient(self, coefficient) -> str:
-        """
-        Prepare the coefficient for latex output.
-
-        Currently not properly implemented. WIP.
-        """
-        # Create the out coefficient string
-        out_coefficient = ""
-
-        # Most likely the coefficient is an addition of terms
-        if isinstance(coefficient, sym.Add):
-            terms = coefficient.args
-            # Split the terms and loop through them to prepare them for latex output case by case
-            for term in terms:
-                # If the term is a multiplication, split the factors and loop through them
-                if isinstance(term, sym.Mul):
-                    factors = term.args
-                    for factor in factors:
-                        # If it is an integer, just add it to the coefficient as a string
-                        if isinstance(factor, sym.Integer):
-                            out_coefficient += f"{factor}"
-                        # If it is another function, prepare it for latex output and add as a string
-                        else:
-                            factor_name = self._prepare_function(factor)
-                            out_coefficient += factor_name
-                # If the term is a function, prepare it for latex output and add as a string
-                else:
-                    factor_name = self._prepare_function(term)
-                    out_coefficient += factor_name
-
-                out_coefficient += "+"
-        # If the coefficient is a multiplication, split the factors and loop through them.
-        elif isinstance(coefficient, sym.Mul):
-            factors = coefficient.args
-            for factor in factors:
-                if isinstance(factor, sym.Integer):
-                    out_coefficient += f"{factor}"
-                else:
-                    factor_name = self._prepare_function(factor)
-                    out_coefficient += factor_name
-                #else:
-                #    raise NotImplementedError(f'Factor type {type(factor)} not implemented')
-        else:
-            factor_name = self._prepare_function(coefficient)
-            out_coefficient += factor_name
-        #else:
-        #    raise NotImplementedError(f'Factor type {type(coefficient)} not implemented')
-        out_coefficient = self._clean_string(out_coefficient)
-        return out_coefficient        
-
-    def _clean_string(self, string: str) -> str:
-        """
-        Clean the double plus signs from the string.
-        """
-        # Replace double plus
-        out_string = string.replace("++", "+")
-        # Replace plus minus
-        out_string = out_string.replace("+-", "-")
-
-        # Remove leading and trailing plus signs
-        if out_string[0] == "+":
-            out_string = out_string[1:]
-        if out_string[-1] == "+":
-            out_string = out_string[:-1]
-
-        #replace multiplication by one
-        out_string = out_string.replace("1", "")
-        return out_string
-
-    def _prepare_function(self, factor) -> str:
-        factor_name = factor.name
-        factor_name_list = factor_name.split('_')
-    
-        function = factor_name_list[0].split("^")[0]
-        exponent = factor_name_list[0].split("^")[1]
-        subscript = factor_name_list[1]
-
-        return "\\"+function+"_"+"{"+subscript+"}^"+exponent
+                index[canonical] = key
 
-    # Method to remove duplicate entries in monomial dictionary
-    def _remove_duplicates(self, monomials: dict) -> dict:
+        self.merged_monomials = merged_monomials
+        return set(index.values())
+
+    @staticmethod
+    def _canonical_coefficient(coefficient, expand: bool = False):
         """
-        Remove duplicate entries in the monomial dictionary.
+        Normalize the sign and the content of a coefficient, such that -2*(a + b) and a + b
+        compare equal.
         """
-        sorted_monomials = dict()
-        for key, value in monomials.items():
-            duplicate = False
-            for k, v in sorted_monomials.items():
-                if value == v:
-                    duplicate = True
-                    break
-            if not duplicate:
-                sorted_monomials[key] = value
-        return sorted_monomials
\ No newline at end of file
+        coefficient = sym.sympify(coefficient)
+        if expand:
+            coefficient = sym.expand(coefficient)
+        _, primitive = coefficient.as_content_primitive()
+        if primitive.could_extract_minus_sign():
+            primitive = -primitive
+        return primitive
+
+
+def _collect_terms(terms, generators: tuple[sym.Symbol, ...]) -> dict:
+    """
+    Sort expanded terms into a dictionary from exponent tuples over the generators to
+    coefficients.
+    """
+    position = {g: k for k, g in enumerate(generators)}
+
+    # Collect the coefficients of every monomial as lists of terms and add them up in the end
+    collected: dict[tuple[int, ...], list] = dict()
+    for term in terms:
+        exponents = [0] * len(generators)
+        coefficient = []
+        for factor in sym.Mul.make_args(term):
+            base, exp = factor.as_base_exp()
+            if base in position and exp.is_Integer and exp > 0:
+                exponents[position[base]] += int(exp)
+            else:
+                coefficient.append(factor)
+        collected.setdefault(tuple(exponents), []).append(sym.Mul(*coefficient))
+    return {exponents: sym.Add(*coefficients) for exponents, coefficients in collected.items()}
+
+
+def _truncated_terms(expr, position: dict, bound: tuple[int, ...], memo: dict) -> dict:
+    """
+    Expand an expression in the generators up to the exponents in bound, as a dictionary from
+    exponent tuples to unexpanded coefficients. Generators with position -1 have the bound
+    zero.
+    """
+    if expr in memo:
+        return memo[expr]
+
+    zero = (0,) * len(bound)
+    if expr in position:
+        k = position[expr]
+        terms = dict()
+        if k >= 0 and bound[k] > 0:
+            terms[tuple(int(i == k) for i in range(len(bound)))] = sym.S.One
+    elif not any(s in position for s in expr.free_symbols):
+        terms = {zero: expr}
+    elif isinstance(expr, sym.Add):
+        collected: dict[tuple[int, ...], list] = dict()
+        for arg in expr.args:
+            for exponents, coefficient in _truncated_terms(arg, position, bound, memo).items():
+                collected.setdefault(exponents, []).append(coefficient)
+        terms = {exponents: sym.Add(*coefficients)
+                 for exponents, coefficients in collected.items()}
+    elif isinstance(expr, sym.Mul):
+        terms = {zero: sym.S.One}
+        for arg in expr.args:
+            factor = _truncated_terms(arg, position, bound, memo)
+            terms = _truncated_product(terms, factor, bound)
+    elif isinstance(expr, sym.Pow) and expr.exp.is_Integer and expr.exp > 0:
+        base = _truncated_terms(expr.base, position, bound, memo)
+        terms = {zero: sym.S.One}
+        for _ in range(int(expr.exp)):
+            terms = _truncated_product(terms, base, bound)
+    else:
+        raise NotImplementedError(
+            f'The expression is not polynomial in the jet symbols: {expr}'
+        )
+
+    memo[expr] = terms
+    return terms
+
+
+def _truncated_product(a: dict, b: dict, bound: tuple[int, ...]) -> dict:
+    """
+    Product of two truncated expansions, dropping the exponents above the bound.
+    """
+    collected: dict[tuple[int, ...], list] = dict()
+    for exponents_a, coefficient_a in a.items():
+        for exponents_b, coefficient_b in b.items():
+            exponents = tuple(i + j for i, j in zip(exponents_a, exponents_b))
+            if all(e <= m for e, m in zip(exponents, bound)):
+                collected.setdefault(exponents, []).append(coefficient_a * coefficient_b)
+    return {exponents: sym.Add(*coefficients) for exponents, coefficients in collected.items()}
+
+
+# Prolongation object of a worker process in compute_vector_field_coefficients
+_worker: Prolongation | None = None
+
+
+def _init_worker(independent_variables: list[sym.Symbol],
+                 dependent_variables: list[sym.Function], simplify,
+                 permutations: bool) -> None:
+    global _worker
+    _worker = Prolongation(independent_variables, dependent_variables, simplify=simplify,
+                           permutations=permutations)
+
+
+def _compute_step(task: tuple) -> tuple:
+    """
+    Compute one coefficient from its parent, which is sent along with the jet table entries of
+    its symbols. Returns the coefficient, the jet table entries of its symbols and the time
+    spent simplifying it.
+    """
+    assert _worker is not None, "The worker process is not initialized"
+    parent, entries, derivative, dependent_variable_index = task
+    _worker.jet.update(entries)
+    _worker._coefficients[(dependent_variable_index, derivative[:-1])] = parent
+    _worker.simplify_timings = dict()
+    phi = _worker._coefficient(derivative, dependent_variable_index)
+    return phi, _worker.jet.entries(phi.free_symbols), _worker.simplify_timings
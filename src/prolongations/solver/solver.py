@@ -0,0 +1,228 @@
+import itertools
+
+import sympy as sym
+
+import prolongations as pr
+
+
+class Solver:
+    """
+    Solver for the linear system of determining equations.
+
+    The determining equations are linear in the partial derivatives of the unknown xi and phi,
+    with coefficients that are functions of the base coordinates (x, u). They are stored as a
+    sparse matrix, with one dict from unknown to coefficient per equation, and reduced by
+    sparse row reduction. The unknowns are ranked Riquier style: higher derivatives first, then
+    by function, then by derivative, so every reduced equation is solved for its highest ranked
+    derivative. For common cases the symmetry generators are found through a polynomial ansatz
+    for xi and phi.
+    """
+
+    def __init__(self, prolongation: pr.Prolongation, monomials: dict) -> None:
+        """
+        Initialize the Solver object
+
+        args:
+            prolongation: pr.Prolongation - the prolongation the monomials were computed with
+            monomials: dict - monomial dictionary, e.g. from get_monomials or
+                determining_equations
+
+        attributes:
+            prolongation: pr.Prolongation - the prolongation the monomials were computed with
+            jet: pr.JetSpace - jet space of the prolongation
+            functions: list[sym.Symbol] - the unknown functions, xi followed by phi
+            rows: list[dict] - the determining equations as sparse rows from unknown to
+                coefficient
+        """
+        self.prolongation = prolongation
+        self.jet = prolongation.jet
+        self.functions = [*prolongation.xi, *prolongation.phi]
+        self._function_index = {f: k for k, f in enumerate(self.functions)}
+        self._base = prolongation._base_coordinates()
+
+        self.rows = [row for row in (self._row(c) for c in monomials.values()) if row]
+
+    def rank(self, unknown: sym.Symbol) -> tuple:
+        """
+        Ranking of the unknowns, the smallest rank is the highest ranked unknown.
+        """
+        f, counts = self.jet._partial_index[unknown]
+        return (-sum(counts), self._function_index[f], tuple(-c for c in counts))
+
+    def reduce(self, prolong: int = 0) -> list:
+        """
+        Reduce the determining equations.
+
+        args:
+            prolong: int - number of times all equations are differentiated with respect to
+                every base coordinate and added to the system before reducing again, which
+                uncovers integrability conditions
+
+        returns:
+            list - the reduced equations, each solved for its highest ranked unknown, as
+                expressions equal to zero
+        """
+        rows = self.rows
+        for _ in range(prolong):
+            rows = self._row_reduce(rows, self.rank)
+            rows = rows + [
+                self._differentiate(row, k)
+                for row in rows
+                for k in range(len(self._base))
+            ]
+        rows = self._row_reduce(rows, self.rank)
+        return [sym.Add(*[c * unknown for unknown, c in row.items()]) for row in rows]
+
+    def generators(self, degree: int = 2, prolong: int = 0) -> list[dict]:
+        """
+        Symmetry generators with polynomial coefficients.
+
+        Inserts a polynomial ansatz of the given degree in the base coordinates for every xi
+        and phi into the reduced equations and solves the resulting sparse linear system for
+        the coefficients of the ansatz.
+
+        args:
+            degree: int - degree of the polynomial ansatz
+            prolong: int - see reduce
+
+        returns:
+            list[dict] - a basis of the polynomial symmetries, each a dict from the functions
+                xi and phi to expressions
+        """
+        monomials = [sym.Mul(*powers) for powers in self._powers(degree)]
+        constants = []
+        ansatz = dict()
+        for f in self.functions:
+            coefficients = sym.symbols(
+                f"c_{self._function_index[f]}_0:{len(monomials)}"
+            )
+            constants += coefficients
+            ansatz[f] = sym.Add(*[c * m for c, m in zip(coefficients, monomials)])
+
+        # Every reduced equation gives one linear equation in the constants per monomial in the
+        # base coordinates. The reduction divides by the pivots, so the coefficients of the
+        # reduced equations are rational functions, and only their numerators have to vanish
+        equations = self.reduce(prolong)
+        symbols = set().union(*[e.free_symbols for e in equations])
+        mapping = self.jet.partial_derivatives(ansatz, symbols)
+        rows = []
+        for equation in equations:
+            residual = sym.together(equation.xreplace(mapping)).as_numer_denom()[0]
+            residual = sym.expand(residual)
+            if residual == 0:
+                continue
+            for coefficient in sym.Poly(residual, *self._base).coeffs():
+                rows.append(self._linear_row(coefficient, constants))
+
+        # The free constants of the reduced system span the solutions
+        position = {c: k for k, c in enumerate(constants)}
+        pivots = {
+            min(row, key=position.__getitem__): row
+            for row in self._row_reduce(rows, position.get)
+        }
+        generators = []
+        for free in constants:
+            if free in pivots:
+                continue
+            values = {free: 1}
+            for pivot, row in pivots.items():
+                values[pivot] = -row.get(free, 0)
+            values = {c: values.get(c, 0) for c in constants}
+            generators.append(
+                {f: sym.expand(a.xreplace(values)) for f, a in ansatz.items()}
+            )
+        return generators
+
+    def _row(self, coefficient) -> dict:
+        """
+        Sparse row of an equation that is linear in the unknowns.
+        """
+        row: dict = dict()
+        for term in sym.Add.make_args(sym.expand(coefficient)):
+            unknowns = [s for s in term.free_symbols if s in self.jet._partial_index]
+            assert (
+                len(unknowns) == 1
+            ), f"The equation is not linear in the unknowns: {term}"
+            row[unknowns[0]] = row.get(unknowns[0], 0) + term / unknowns[0]
+        return {unknown: c for unknown, c in row.items() if c != 0}
+
+    def _linear_row(self, expr, constants: list) -> dict:
+        """
+        Sparse row of an expression that is linear in the constants of the ansatz.
+        """
+        row = dict()
+        for c in expr.free_symbols & set(constants):
+            row[c] = expr.coeff(c)
+        return row
+
+    def _differentiate(self, row: dict, k: int) -> dict:
+        """
+        Partial derivative of an equation with respect to the k-th base coordinate.
+        """
+        variable = self._base[k]
+        differentiated: dict = dict()
+        for unknown, c in row.items():
+            f, counts = self.jet._partial_index[unknown]
+            derivative = self.jet.partial(
+                f, counts[:k] + (counts[k] + 1,) + counts[k + 1 :]
+            )
+            differentiated[derivative] = differentiated.get(derivative, 0) + c
+            dc = sym.diff(c, variable)
+            if dc != 0:
+                differentiated[unknown] = differentiated.get(unknown, 0) + dc
+        return {unknown: c for unknown, c in differentiated.items() if c != 0}
+
+    def _powers(self, degree: int) -> list:
+        powers = []
+        for exponents in itertools.product(range(degree + 1), repeat=len(self._base)):
+            if sum(exponents) <= degree:
+                powers.append([v**e for v, e in zip(self._base, exponents)])
+        return powers
+
+    @staticmethod
+    def _row_reduce(rows: list[dict], rank) -> list[dict]:
+        """
+        Sparse reduced row echelon form of the rows.
+
+        Every row is reduced by the pivot rows found so far, normalized on its highest ranked
+        column, and then eliminated from the earlier pivot rows. Returns the pivot rows sorted
+        by their pivot.
+        """
+        pivots: dict = dict()
+        for row in rows:
+            row = dict(row)
+            for column in [column for column in row if column in pivots]:
+                if column in row:
+                    row = Solver._subtract(row, row[column], pivots[column])
+            if not row:
+                continue
+
+            pivot = min(row, key=rank)
+            factor = row[pivot]
+            row = {column: Solver._simplify(c / factor) for column, c in row.items()}
+
+            for column, pivot_row in pivots.items():
+                if pivot in pivot_row:
+                    pivots[column] = Solver._subtract(pivot_row, pivot_row[pivot], row)
+            pivots[pivot] = row
+
+        return [pivots[pivot] for pivot in sorted(pivots, key=rank)]
+
+    @staticmethod
+    def _subtract(row: dict, factor, pivot_row: dict) -> dict:
+        """
+        row - factor*pivot_row, dropping the zero entries.
+        """
+        row = dict(row)
+        for column, c in pivot_row.items():
+            value = Solver._simplify(row.get(column, 0) - factor * c)
+            if value == 0:
+                row.pop(column, None)
+            else:
+                row[column] = value
+        return row
+
+    @staticmethod
+    def _simplify(c):
+        c = sym.sympify(c)
+        return c if c.is_Number else sym.cancel(c)
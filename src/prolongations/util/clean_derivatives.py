@@ -1,39 +1,56 @@
+from collections import Counter
+from functools import lru_cache
+
 import sympy as sym
+from sympy.core.function import AppliedUndef
+
+from prolongations.util.instrumentation import instrument
+from prolongations.util.total_derivative import _function
 
-from math import prod
 
 def sort_derivatives(derivatives, args):
-    order = [arg.name for arg in args]
-    sorted_derivatives = []
-    for arg in order:
-        for derivative in derivatives:
-            if arg == derivative:
-                sorted_derivatives.append(derivative)
-    return sorted_derivatives
+    counts = Counter(derivatives)
+    return [arg.name for arg in args for _ in range(counts[arg.name])]
+
+
+def split_derivatives(derivatives, args):
+    """Split already cleaned derivative strings like 'xxu' into the names of the arguments"""
+    names = sorted((arg.name for arg in args), key=len, reverse=True)
+    split = []
+    for derivative in derivatives:
+        while derivative:
+            name = next((name for name in names if derivative.startswith(name)), derivative)
+            split.append(name)
+            derivative = derivative[len(name):]
+    return split
 
 
+@lru_cache(maxsize=4096)
 def clean_base(f):
     name_list = f.name.split('_')
-    derivatives = name_list[1:]
+    if len(name_list) == 1:
+        return f
+    derivatives = split_derivatives(name_list[1:], f.args)
     # Sort list of derivatives to ensure same order as args
     sorted_derivatives = sort_derivatives(derivatives, f.args)
     # Create new name
     new_name = f'{name_list[0]}_{"".join(sorted_derivatives)}'
-    return sym.Function(new_name)(*f.args)
+    return _function(new_name)(*f.args)
+
 
+@instrument("clean")
 def clean(f):
-    if isinstance(f, sym.Function):
-        return clean_base(f)
-    elif isinstance(f, sym.Add):
-        args = f.args
-        return sum(clean(arg) for arg in args)
-    elif isinstance(f, sym.Mul):
-        args = f.args
-        return prod([clean(arg) for arg in args])
-    elif isinstance(f, sym.Pow):
-        base, exp = f.args
-        return sym.Pow(clean(base), exp)
-    elif isinstance(f, sym.Integer):
+    """Bring the derivatives in the names of all functions in f to the order of their arguments
+
+    The distinct functions are collected once, each is cleaned once (and cached across calls),
+    and all of them are replaced in a single xreplace pass.
+    """
+    f = sym.sympify(f)
+    mapping = dict()
+    for atom in f.atoms(AppliedUndef):
+        cleaned = clean_base(atom)
+        if cleaned != atom:
+            mapping[atom] = cleaned
+    if mapping == {}:
         return f
-    else:
-        raise NotImplementedError(f'Function type {type(f)} not implemented')
\ No newline at end of file
+    return f.xreplace(mapping)
@@ -0,0 +1,155 @@
+import hashlib
+import pickle
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import sympy as sym
+
+import prolongations as pr
+
+
+class DiskCache:
+    """
+    Persistent on-disk cache, e.g. for computed vector field coefficients.
+
+    The entries are pickled into an SQLite database. Every key is hashed together with the
+    source code of prolongations and the version of sympy, so results computed by other code
+    are never reused. When the pickled entries grow beyond max_size bytes, the least recently
+    used entries are evicted. Reads do not write to the database: their access times are kept
+    in memory and written together with the next entry, by flush or on close.
+    """
+
+    def __init__(self, path: str, max_size: int = 2**30) -> None:
+        """
+        Initialize the DiskCache object
+
+        args:
+            path: str - path of the SQLite database file, created if it does not exist
+            max_size: int - maximal total size of the pickled entries in bytes
+
+        attributes:
+            path: str - path of the SQLite database file
+            max_size: int - maximal total size of the pickled entries in bytes
+        """
+        self.path = path
+        self.max_size = max_size
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)"
+        )
+        self._connection.commit()
+
+        # Access times of the entries read since the last write
+        self._accessed: dict[str, float] = dict()
+
+    def key(self, *parts) -> str:
+        """
+        Hash the given parts, which need a stable repr, together with the source code of
+        prolongations and the version of sympy.
+        """
+        versions = (pr.__version__, _source_digest(), sym.__version__)
+        return hashlib.sha256(repr((versions, parts)).encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        Get the entry stored under the key, or None if there is none.
+        """
+        row = self._connection.execute(
+            "SELECT value FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._accessed[key] = time.time()
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        """
+        Store an entry under the key and evict the least recently used entries if the cache is
+        too large.
+        """
+        data = pickle.dumps(value)
+        self._write_accessed()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+            (key, data, len(data), time.time()),
+        )
+        self._evict()
+        self._connection.commit()
+
+    def flush(self) -> None:
+        """
+        Write the access times of the entries read since the last write.
+        """
+        if self._accessed:
+            self._write_accessed()
+            self._connection.commit()
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        self._accessed.clear()
+        self._connection.execute("DELETE FROM cache")
+        self._connection.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def size(self) -> int:
+        """
+        Total size of the pickled entries in bytes.
+        """
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        row = self._connection.execute(
+            "SELECT 1 FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        return row is not None
+
+    def _write_accessed(self) -> None:
+        """
+        Update the access times of the entries read since the last write, without committing.
+        """
+        self._connection.executemany(
+            "UPDATE cache SET accessed = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self) -> None:
+        size = self.size()
+        if size <= self.max_size:
+            return
+        rows = self._connection.execute(
+            "SELECT key, size FROM cache ORDER BY accessed"
+        ).fetchall()
+        for key, entry_size in rows:
+            if size <= self.max_size:
+                break
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            size -= entry_size
+
+
+@lru_cache(maxsize=1)
+def _source_digest() -> str:
+    """
+    Hash of the source files of prolongations, such that every change of the code changes the
+    keys.
+    """
+    digest = hashlib.sha256()
+    root = Path(pr.__file__).parent
+    for path in sorted(root.rglob("*.py")):
+        digest.update(path.relative_to(root).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
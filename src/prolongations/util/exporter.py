@@ -0,0 +1,143 @@
+import ast
+import json
+import pickle
+
+import sympy as sym
+
+import prolongations as pr
+
+
+class Exporter:
+    """
+    Streaming writer of monomial tables.
+
+    Writes the rows of a monomial dictionary one by one to a file-like object, without building
+    the whole output in memory. The formats are
+        latex: a tabular with the monomials and coefficients typeset by sym.latex, not meant to
+            be read back
+        json: one JSON object per line with the monomial and the srepr of the coefficient
+        srepr: one line per row with the repr of the monomial and the srepr of the coefficient,
+            separated by a tab
+        pickle: one pickled (monomial, coefficient) pair per row, the file has to be opened in
+            binary mode
+    All formats but latex are read back by Exporter.load. The monomials are keyed as in
+    Prolongation.get_monomials, or as (index of the equation, monomial) for systems.
+    """
+
+    formats = ("latex", "json", "srepr", "pickle")
+
+    def __init__(
+        self, file, format: str = "latex", jet: pr.JetSpace | None = None
+    ) -> None:
+        """
+        Initialize the Exporter object
+
+        args:
+            file: file-like object to write to
+            format: str - one of Exporter.formats
+            jet: pr.JetSpace | None - jet space of the monomials, needed to typeset them in the
+                latex format
+
+        attributes:
+            file: file-like object to write to
+            format: str - the output format
+            jet: pr.JetSpace | None - jet space of the monomials
+            rows: int - number of rows written
+        """
+        if format not in self.formats:
+            raise ValueError(f"Unknown export format {format}")
+        assert (
+            format != "latex" or jet is not None
+        ), "The latex format needs the jet space of the monomials"
+        self.file = file
+        self.format = format
+        self.jet = jet
+        self.rows = 0
+
+    def __enter__(self):
+        self.write_header()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        # Only close the table of a complete export
+        if exc_type is None:
+            self.write_footer()
+
+    def write_header(self) -> None:
+        if self.format == "latex":
+            self.file.write("\\begin{table}[]\n\\centering\n\\begin{tabular}{c|c}\n")
+            self.file.write("monomial & coefficient \\\\\n\\hline\n")
+
+    def write_footer(self) -> None:
+        if self.format == "latex":
+            self.file.write("\\end{tabular}\n\\caption{Caption}\n\\label{tab:label}\n")
+            self.file.write("\\end{table}\n")
+
+    def write_row(self, monomial, coefficient) -> None:
+        """
+        Write a single row of a monomial table.
+        """
+        if self.format == "latex":
+            latex = sym.latex(coefficient)
+            self.file.write(f"{self._latex_monomial(monomial)} & ${latex}$ \\\\\n")
+        elif self.format == "json":
+            key = list(monomial) if isinstance(monomial, tuple) else monomial
+            row = {"monomial": key, "coefficient": sym.srepr(coefficient)}
+            self.file.write(json.dumps(row) + "\n")
+        elif self.format == "srepr":
+            self.file.write(f"{monomial!r}\t{sym.srepr(coefficient)}\n")
+        else:
+            pickle.dump((monomial, coefficient), self.file)
+        self.rows += 1
+
+    def export(self, monomials) -> int:
+        """
+        Write a whole table, from a monomial dictionary or an iterable of (monomial,
+        coefficient) pairs, including the header and the footer. Returns the number of rows
+        written.
+        """
+        rows = monomials.items() if isinstance(monomials, dict) else monomials
+        with self:
+            for monomial, coefficient in rows:
+                self.write_row(monomial, coefficient)
+        return self.rows
+
+    @staticmethod
+    def load(file, format: str):
+        """
+        Read back the rows written in the json, srepr or pickle format, yielding (monomial,
+        coefficient) pairs.
+        """
+        if format == "json":
+            for line in file:
+                if line.strip():
+                    row = json.loads(line)
+                    key = row["monomial"]
+                    if isinstance(key, list):
+                        key = tuple(key)
+                    yield key, sym.sympify(row["coefficient"])
+        elif format == "srepr":
+            for line in file:
+                if line.strip():
+                    key, coefficient = line.rstrip("\n").split("\t")
+                    yield ast.literal_eval(key), sym.sympify(coefficient)
+        elif format == "pickle":
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+        else:
+            raise ValueError(f"The {format} format can not be read back")
+
+    def _latex_monomial(self, monomial) -> str:
+        """
+        Typeset a monomial name, e.g. 'u_x^2u_xx', through sym.latex of its jet symbols.
+        """
+        prefix = ""
+        if isinstance(monomial, tuple):
+            prefix = f"$\\Delta_{{{monomial[0]}}}$: "
+            monomial = monomial[1]
+        assert self.jet is not None
+        expr = sym.Mul(*[s**exp for s, exp in self.jet.parse_monomial(monomial)])
+        return f"{prefix}${sym.latex(expr)}$"
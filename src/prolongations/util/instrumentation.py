@@ -0,0 +1,162 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import sympy as sym
+
+# Recorder of the active instrumentation context, None when instrumentation is disabled
+_recorder = None
+
+
+class Recorder:
+    """
+    Statistics of the instrumented stages.
+
+    For every stage the number of calls, the cumulative time and the size of the expressions
+    going in and out are recorded. Times are inclusive, i.e. the time of a stage includes the
+    instrumented stages it calls.
+    """
+
+    def __init__(self, callback=None, sizes: bool = True) -> None:
+        """
+        Initialize the Recorder object
+
+        args:
+            callback: callable | None - called as callback(name, record) after every
+                instrumented call, where record is a dict with the time and the input and
+                output sizes of the call
+            sizes: bool - measure expression sizes, which costs a traversal of every expression
+
+        attributes:
+            stats: dict[str, dict] - per stage the calls, the cumulative time, and the summed
+                and maximal sizes
+        """
+        self.callback = callback
+        self.sizes = sizes
+        self.stats: dict[str, dict] = dict()
+
+    def call(self, name: str, function, args: tuple, kwargs: dict, argument: int):
+        """
+        Call an instrumented function and record the call.
+        """
+        measured = self.sizes and len(args) > argument
+        size_in = expression_size(args[argument]) if measured else {}
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        size_out = expression_size(result) if self.sizes else {}
+        self.record(name, seconds, size_in, size_out)
+        return result
+
+    def record(self, name: str, seconds: float, size_in: dict, size_out: dict) -> None:
+        stats = self.stats.setdefault(
+            name,
+            {
+                "calls": 0,
+                "time": 0.0,
+                "in": dict(),
+                "out": dict(),
+                "max_in": dict(),
+                "max_out": dict(),
+            },
+        )
+        stats["calls"] += 1
+        stats["time"] += seconds
+        for key, size in (("in", size_in), ("out", size_out)):
+            for metric, value in size.items():
+                stats[key][metric] = stats[key].get(metric, 0) + value
+                stats[f"max_{key}"][metric] = max(
+                    stats[f"max_{key}"].get(metric, 0), value
+                )
+        if self.callback is not None:
+            self.callback(name, {"time": seconds, "in": size_in, "out": size_out})
+
+    def summary(self) -> str:
+        """
+        Table of the calls, the cumulative time and the largest output of every stage, slowest
+        first.
+        """
+        lines = [
+            f'{"stage":<32}{"calls":>8}{"time [s]":>12}{"max ops in":>12}'
+            f'{"max ops out":>12}'
+        ]
+        for name, stats in sorted(
+            self.stats.items(), key=lambda item: -item[1]["time"]
+        ):
+            ops_in = stats["max_in"].get("count_ops", "")
+            ops_out = stats["max_out"].get("count_ops", "")
+            lines.append(
+                f'{name:<32}{stats["calls"]:>8}{stats["time"]:>12.4f}'
+                f"{ops_in:>12}{ops_out:>12}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def instrumentation(callback=None, sizes: bool = True):
+    """
+    Enable instrumentation within a with block, yielding the Recorder that collects the
+    statistics.
+
+        with pr.instrumentation() as recorder:
+            prolongate.determining_equations(equation)
+        print(recorder.summary())
+    """
+    global _recorder
+    previous = _recorder
+    _recorder = Recorder(callback, sizes)
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+def instrument(name: str, argument: int = 0):
+    """
+    Decorator recording the calls of a function as the stage name while instrumentation is
+    enabled.
+
+    The positional argument with the given index is measured as the input expression. When
+    instrumentation is disabled the only overhead is one check of a global.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return function(*args, **kwargs)
+            return _recorder.call(name, function, args, kwargs, argument)
+
+        return wrapper
+
+    return decorator
+
+
+def expression_size(expr) -> dict:
+    """
+    Size of an expression: count_ops, number of terms and tree depth. Dictionaries, e.g. of
+    monomials, are measured by their values, with the number of entries as terms. Other objects
+    have no size.
+    """
+    if isinstance(expr, dict):
+        sizes = [expression_size(value) for value in expr.values()]
+        return {
+            "count_ops": sum(size.get("count_ops", 0) for size in sizes),
+            "terms": len(sizes),
+            "depth": max([size.get("depth", 0) for size in sizes] + [0]),
+        }
+    if not isinstance(expr, sym.Basic):
+        return {}
+    return {
+        "count_ops": sym.count_ops(expr),
+        "terms": len(sym.Add.make_args(expr)),
+        "depth": _depth(expr, dict()),
+    }
+
+
+def _depth(expr, memo: dict) -> int:
+    if not expr.args:
+        return 1
+    if expr not in memo:
+        memo[expr] = 1 + max(_depth(arg, memo) for arg in expr.args)
+    return memo[expr]
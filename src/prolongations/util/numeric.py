@@ -0,0 +1,32 @@
+import sympy as sym
+
+
+def lambdify_coefficients(coefficients: list, args: list):
+    """
+    Compile a list of expressions into one vectorized NumPy function.
+
+    Common subexpressions are eliminated across all the expressions (sym.cse), so shared parts
+    of the coefficients are only evaluated once. The returned function takes one array (or
+    scalar) per argument and returns an array of shape (len(coefficients), *broadcast shape of
+    the arguments). Needs numpy, which is installed with the numeric extra.
+
+    args:
+        coefficients: list - the expressions to evaluate, e.g. the coefficients of a monomial
+            dictionary
+        args: list - the symbols that become the arguments of the function
+    """
+    import numpy as np
+
+    compiled = sym.lambdify(args, list(coefficients), modules="numpy", cse=True)
+
+    def function(*values):
+        # Constant coefficients come out as scalars, so broadcast everything to the shape of
+        # the arguments
+        shape = np.broadcast_shapes(*[np.shape(value) for value in values])
+        results = compiled(*values) if len(coefficients) > 0 else []
+        out = np.empty((len(coefficients),) + shape)
+        for k, result in enumerate(results):
+            out[k] = result
+        return out
+
+    return function
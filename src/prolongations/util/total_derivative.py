@@ -1,61 +1,112 @@
+from functools import lru_cache
+
 import sympy as sym
+from sympy.core.function import AppliedUndef
+
+from prolongations.util.instrumentation import instrument
+
 
-from math import prod
+@lru_cache(maxsize=None)
+def _function(name: str):
+    """Function class of the given name, created once"""
+    return sym.Function(name)
 
 
 def D_base(f: sym.Function, x: sym.Symbol):
-    """Material derivative with simplification to notations"""
+    """Material derivative with simplification to notations
+
+    Builds D_x f = f_x + sum_u u_x f_u directly from the names, without going through sym.diff.
+    """
+    if isinstance(f, sym.Symbol):
+        return sym.Integer(1) if f == x else sym.Integer(0)
+
     name = f.name
     args = f.args
     function_args = [arg for arg in args if isinstance(arg, sym.Function)]
 
     x_name = x.name
 
-    # Derivate f with respect to x
-    Df_Dx = sym.diff(f, x)
-
-    # Make substitutions
     if function_args == []:
-        u_x = sym.Function(f'{name}_{x_name}')(*args)
-        Df_Dx = Df_Dx.subs(sym.Derivative(f, x), u_x)
+        # u_x
+        if x not in args:
+            return sym.Integer(0)
+        return _function(f'{name}_{x_name}')(*args)
 
-    else:
-        for u in function_args:
-            u_name = u.name
-            u_args = u.args
-            
-            # u_x
-            u_x = sym.Function(f'{u_name}_{x.name}')(*u_args)
-            Df_Dx = Df_Dx.subs(sym.Derivative(u, x), u_x)
+    terms = []
+    # f_x
+    if x in args:
+        terms.append(_function(f'{name}_{x_name}')(*args))
+    for u in function_args:
+        if x in u.args:
+            # u_x f_u
+            u_x = _function(f'{u.name}_{x_name}')(*u.args)
+            f_u = _function(f'{name}_{u.name}')(*args)
+            terms.append(u_x * f_u)
 
-            # f_u
-            f_u = sym.Function(f'{name}_{u_name}')(*args)
-            Df_Dx = Df_Dx.subs(sym.Derivative(f, u), f_u)
+    return sym.Add(*terms)
 
-            # f_x
-            f_x = sym.Function(f'{name}_{x_name}')(*args)
-            substitutions = {expr: f_x for expr in Df_Dx.atoms(sym.Subs)}
-            Df_Dx = Df_Dx.subs(substitutions)
 
+@instrument("D")
+def D(f, x, base=None):
+    """Total derivative of f with respect to x. The atoms of f are differentiated by base,
+    which defaults to D_base
+
+    Products are differentiated with prefix and suffix partial products, powers and functions
+    like sin or exp with the chain rule. The derivative of every distinct subexpression is only
+    computed once per call.
+    """
+    if base is None:
+        base = D_base
+    return _D(sym.sympify(f), x, base, dict())
 
-    return Df_Dx
 
+def _D(f, x, base, memo: dict):
+    if f in memo:
+        return memo[f]
 
-def D(f, x):
-    # Df_Dx: sym.Function = None
-    if isinstance(f, sym.Function):
-        return D_base(f, x)
+    if isinstance(f, (AppliedUndef, sym.Symbol)):
+        Df_Dx = base(f, x)
+    elif isinstance(f, sym.Number):
+        Df_Dx = sym.Integer(0)
     elif isinstance(f, sym.Add):
-        args = f.args
-        return sum(D(arg, x) for arg in args)
+        Df_Dx = sym.Add(*[_D(arg, x, base, memo) for arg in f.args])
     elif isinstance(f, sym.Mul):
         args = f.args
-        return sum(D(arg_d, x)*prod([arg_p for arg_p in args if arg_p != arg_d]) for arg_d in args)
+        # prefix[i] is the product of the factors before i, suffix[i] the product of the
+        # factors after i
+        prefix = [sym.Integer(1)]
+        for arg in args[:-1]:
+            prefix.append(prefix[-1] * arg)
+        suffix = [sym.Integer(1)]
+        for arg in reversed(args[1:]):
+            suffix.append(suffix[-1] * arg)
+        suffix.reverse()
+        terms = []
+        for i, arg in enumerate(args):
+            Darg_Dx = _D(arg, x, base, memo)
+            if Darg_Dx != 0:
+                terms.append(prefix[i] * Darg_Dx * suffix[i])
+        Df_Dx = sym.Add(*terms)
     elif isinstance(f, sym.Pow):
-        base, exp = f.args
-        return exp*sym.Pow(D(base, x), exp-1)
-    elif isinstance(f, sym.Integer):
-        return 0
+        b, exp = f.args
+        # D(b^e) = e b^(e-1) D(b) + b^e log(b) D(e)
+        Df_Dx = exp * sym.Pow(b, exp - 1) * _D(b, x, base, memo)
+        if not exp.is_number:
+            Dexp_Dx = _D(exp, x, base, memo)
+            if Dexp_Dx != 0:
+                Df_Dx += f * sym.log(b) * Dexp_Dx
+    elif isinstance(f, sym.Function):
+        # Chain rule for known functions like sin or exp
+        terms = []
+        for k, arg in enumerate(f.args):
+            Darg_Dx = _D(arg, x, base, memo)
+            if Darg_Dx != 0:
+                terms.append(f.fdiff(k + 1) * Darg_Dx)
+        Df_Dx = sym.Add(*terms)
+    elif f.is_number:
+        Df_Dx = sym.Integer(0)
     else:
-        raise NotImplementedError(f'Function type {type(f)} not implemented') 
+        raise NotImplementedError(f'Function type {type(f)} not implemented')
 
+    memo[f] = Df_Dx
+    return Df_Dx
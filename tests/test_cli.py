@@ -0,0 +1,105 @@
+import json
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+from prolongations import cli
+
+BURGERS = {"independent": ["x", "t"], "dependent": ["u"], "equations": ["u_t = u_xx + u*u_x"]}
+
+
+@pytest.fixture
+def spec(tmp_path):
+    path = tmp_path / "burgers.json"
+    path.write_text(json.dumps(BURGERS))
+    return path
+
+
+def run(spec, output, *args) -> str:
+    assert cli.main([str(spec), "-o", str(output), *args]) == 0
+    return output.read_text()
+
+
+def canonical(text: str) -> set:
+    return {sym.expand(c) for _, c in pr.Exporter.load(text.splitlines(), "srepr")}
+
+
+def test_resume_after_interrupt(spec, tmp_path, monkeypatch):
+    reference = run(spec, tmp_path / "reference.txt", "--no-checkpoint")
+
+    keys = pr.DiskCache(str(tmp_path / "keys.db"))
+    progress = keys.key("monomials", json.dumps(BURGERS, sort_keys=True), 0)
+    writes = []
+    set_ = pr.DiskCache.set
+
+    # Interrupt the run at the second progress record of the symmetry condition, after the
+    # monomials of the second chunk are written
+    def interrupt(self, key, value):
+        writes.append(key)
+        if writes.count(progress) == 2:
+            raise KeyboardInterrupt
+        return set_(self, key, value)
+
+    monkeypatch.setattr(pr.DiskCache, "set", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        run(spec, tmp_path / "interrupted.txt", "--checkpoint-every", "5")
+    writes.clear()
+
+    def record(self, key, value):
+        writes.append(key)
+        return set_(self, key, value)
+
+    monkeypatch.setattr(pr.DiskCache, "set", record)
+    assert run(spec, tmp_path / "resumed.txt", "--checkpoint-every", "5") == reference
+    monkeypatch.undo()
+    # The first chunk is read back, the second one is collected again
+    assert keys.key(progress, 0) not in writes
+    assert keys.key(progress, 1) in writes
+    keys.close()
+
+    # A finished run is read back from the checkpoint
+    assert run(spec, tmp_path / "again.txt", "--checkpoint-every", "5") == reference
+
+
+def test_jobs(spec, tmp_path):
+    reference = run(spec, tmp_path / "reference.txt", "--no-checkpoint")
+    parallel = run(spec, tmp_path / "parallel.txt", "--no-checkpoint", "-j", "2")
+    assert canonical(parallel) == canonical(reference)
+
+
+def test_order(spec, tmp_path):
+    reference = run(spec, tmp_path / "reference.txt", "--no-checkpoint")
+    path = tmp_path / "order.json"
+    path.write_text(json.dumps({**BURGERS, "order": 2}))
+    assert run(path, tmp_path / "order.txt", "--no-checkpoint") == reference
+
+
+@pytest.mark.parametrize("change, message", [
+    ({"dependents": ["v"]}, "Unknown keys in the specification: dependents"),
+    ({"order": 3}, "the equations are of order 2"),
+    ({"equations": ["u_t = u_yy + u*u_x"]}, "u_yy is not a derivative"),
+    ({"equations": ["x = u_xx"]}, "not a derivative of a dependent variable"),
+    ({"equations": []}, "needs an equation"),
+])
+def test_bad_specification(tmp_path, capsys, change, message):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps({**BURGERS, **change}))
+    with pytest.raises(SystemExit):
+        cli.main([str(path), "--no-checkpoint"])
+    assert message in capsys.readouterr().err
+
+
+def test_pickle_needs_output(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        cli.main([str(tmp_path / "missing.json"), "-f", "pickle"])
+    assert "--output" in capsys.readouterr().err
+
+
+def test_system(tmp_path, capsys):
+    path = tmp_path / "wave.json"
+    path.write_text(json.dumps({"independent": ["x", "t"], "dependent": ["u", "v"],
+                                "equations": ["u_t = v_x", "v_t = u_x"]}))
+    assert cli.main([str(path), "--no-checkpoint", "-f", "json"]) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert rows and all(isinstance(row["monomial"], list) for row in rows)
@@ -0,0 +1,109 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+from prolongations.util import disk_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Deterministic access times, one tick per call.
+    """
+    ticks = itertools.count()
+    monkeypatch.setattr(disk_cache.time, "time", lambda: float(next(ticks)))
+
+
+def test_get_set(tmp_path):
+    cache = pr.DiskCache(str(tmp_path / "cache.db"))
+    key = cache.key("coefficient", (0, (0, 1)))
+    assert cache.get(key) is None and key not in cache
+    x = sym.Symbol("x")
+    cache.set(key, x**2 + 1)
+    assert cache.get(key) == x**2 + 1 and key in cache and len(cache) == 1
+    assert cache.key("coefficient", (0, (0, 1))) == key
+    assert cache.key("coefficient", (0, (1, 1))) != key
+    cache.clear()
+    assert len(cache) == 0 and cache.size() == 0
+    cache.close()
+
+
+def test_least_recently_used_are_evicted(tmp_path, clock):
+    cache = pr.DiskCache(str(tmp_path / "cache.db"))
+    cache.set("a", "a" * 100)
+    cache.set("b", "b" * 100)
+    cache.max_size = cache.size() + 50
+    assert cache.get("a") is not None
+    cache.set("c", "c" * 100)
+    assert "a" in cache and "b" not in cache and "c" in cache
+    assert cache.size() <= cache.max_size
+    cache.close()
+
+
+def test_reads_are_not_written(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    cache = pr.DiskCache(path)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    # The access time of a is written with close, so b is the least recently used one
+    other = pr.DiskCache(path)
+    assert other._connection.execute("SELECT key FROM cache ORDER BY accessed").fetchall() \
+        == [("a",), ("b",)]
+    cache.close()
+    assert other._connection.execute("SELECT key FROM cache ORDER BY accessed").fetchall() \
+        == [("b",), ("a",)]
+    other.close()
+
+
+def test_reload(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = pr.DiskCache(path)
+    cache.set(cache.key("entry"), {"u_x": sym.Symbol("xi") + 1})
+    cache.close()
+
+    cache = pr.DiskCache(path)
+    assert cache.get(cache.key("entry")) == {"u_x": sym.Symbol("xi") + 1}
+    cache.close()
+
+
+def write(path: str, k: int) -> None:
+    cache = pr.DiskCache(path)
+    for i in range(10):
+        cache.set(cache.key(k, i), (k, i))
+    cache.close()
+
+
+def test_writes_from_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(write, [path] * 4, range(4)))
+    cache = pr.DiskCache(path)
+    assert len(cache) == 40
+    assert all(cache.get(cache.key(k, i)) == (k, i) for k in range(4) for i in range(10))
+    cache.close()
+
+
+def test_coefficients_reload(tmp_path):
+    path = str(tmp_path / "cache.db")
+    x, t = sym.symbols("x t")
+    u = sym.Function("u")(x, t)
+    derivatives = [[0, 0], [0, 1], [1, 1, 0]]
+
+    cache = pr.DiskCache(path)
+    prolongation = pr.Prolongation([x, t], [u], cache=cache)
+    expected = prolongation.compute_vector_field_coefficients(derivatives, 0, workers=2)
+    cache.close()
+
+    # A new process would start from a new Prolongation, reading everything from the disk
+    cache = pr.DiskCache(path)
+    prolongation = pr.Prolongation([x, t], [u], cache=cache)
+    calls = []
+    prolongation._simplify = calls.append
+    assert prolongation.compute_vector_field_coefficients(derivatives, 0) == expected
+    assert calls == []
+    cache.close()
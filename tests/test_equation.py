@@ -0,0 +1,64 @@
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+@pytest.fixture
+def jet():
+    x, t = sym.symbols("x t")
+    return pr.JetSpace([x, t], [sym.Function("u")(x, t), sym.Function("v")(x, t)])
+
+
+def test_heat_equation_consequences(jet):
+    u_t, u_xx = jet.symbol([1], 0), jet.symbol([0, 0], 0)
+    heat = pr.Equation(sym.Eq(u_t, u_xx), jet)
+    assert heat.rule(jet.symbol([0, 1], 0)) == jet.symbol([0, 0, 0], 0)
+    assert heat.rule(jet.symbol([1, 1], 0)) == jet.symbol([0, 0, 0, 0], 0)
+    assert heat(u_t + jet.symbol([0, 1, 1], 0)) == u_xx + jet.symbol([0] * 5, 0)
+
+
+def test_consequences_are_reduced_total_derivatives(jet):
+    x, t = jet.independent_variables
+    u, u_x, u_t = jet.jet(0, (0, 0)), jet.symbol([0], 0), jet.symbol([1], 0)
+    rhs = jet.symbol([0, 0], 0) + u * u_x
+    burgers = pr.Equation(sym.Eq(u_t, rhs), jet)
+    rules = burgers.rules(3)
+    assert set(rules) == {u_t, jet.symbol([0, 1], 0), jet.symbol([1, 1], 0),
+                          jet.symbol([0, 0, 1], 0), jet.symbol([0, 1, 1], 0),
+                          jet.symbol([1, 1, 1], 0)}
+    for symbol, consequence in rules.items():
+        assert not any(burgers._is_principal(s) for s in consequence.free_symbols)
+        _, (k, l) = jet.key(symbol)
+        expected = rhs
+        for variable in [x] * k + [t] * (l - 1):
+            expected = burgers(jet.total_derivative(expected, variable))
+        assert sym.expand(consequence - expected) == 0, symbol
+
+
+def test_system_substitution(jet):
+    u_t, v_t = jet.symbol([1], 0), jet.symbol([1], 1)
+    u_x, v_x = jet.symbol([0], 0), jet.symbol([0], 1)
+    # The wave equation as a first order system, u_t = v_x, v_t = u_x
+    system = [pr.Equation(sym.Eq(u_t, v_x), jet), pr.Equation(sym.Eq(v_t, u_x), jet)]
+    assert pr.Prolongation._substitute(system, jet.symbol([1, 1], 0)) == jet.symbol([0, 0], 0)
+    assert pr.Prolongation._substitute(system, u_t * v_t) == u_x * v_x
+
+
+def test_system_cycle(jet):
+    u_t, v_t = jet.symbol([1], 0), jet.symbol([1], 1)
+    u_x, v_x = jet.symbol([0], 0), jet.symbol([0], 1)
+    system = [pr.Equation(sym.Eq(u_x, v_t), jet), pr.Equation(sym.Eq(v_t, u_x), jet)]
+    with pytest.raises(ValueError):
+        pr.Prolongation._substitute(system, u_t * v_x + u_x)
+
+
+def test_order(jet):
+    u_t = jet.symbol([1], 0)
+    assert pr.Equation(sym.Eq(u_t, jet.symbol([0] * 4, 0)), jet).order() == 4
+
+
+def test_principal_derivative_on_right_hand_side(jet):
+    u_t = jet.symbol([1], 0)
+    with pytest.raises(AssertionError):
+        pr.Equation(sym.Eq(u_t, jet.symbol([0, 1], 0)), jet)
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+@pytest.fixture
+def jet():
+    x, t = sym.symbols("x t")
+    return pr.JetSpace([x, t], [sym.Function("u")(x, t)])
+
+
+@pytest.fixture
+def monomials(jet):
+    x, t = jet.independent_variables
+    xi = sym.Symbol("xi^x")
+    return {
+        "u_x": 2 * x * xi - sym.Rational(1, 3),
+        "u_x^2u_xx": 12 * jet.symbol([1], 0) * sym.sin(t),
+        (1, "u_xt"): -xi**2,
+    }
+
+
+@pytest.mark.parametrize("format", ["json", "srepr", "pickle"])
+def test_round_trip(monomials, format):
+    file = io.BytesIO() if format == "pickle" else io.StringIO()
+    assert pr.Exporter(file, format).export(monomials) == len(monomials)
+    file.seek(0)
+    assert dict(pr.Exporter.load(file, format)) == monomials
+
+
+def test_latex(jet, monomials):
+    file = io.StringIO()
+    pr.Exporter(file, "latex", jet).export(monomials)
+    latex = file.getvalue()
+    assert latex.startswith("\\begin{table}")
+    assert latex.endswith("\\end{table}\n")
+    assert "12" in latex and "\\Delta_{1}" in latex
+
+
+def test_no_footer_after_error(jet):
+    file = io.StringIO()
+    with pytest.raises(RuntimeError):
+        with pr.Exporter(file, "latex", jet) as exporter:
+            exporter.write_row("u_x", sym.Integer(1))
+            raise RuntimeError
+    assert exporter.rows == 1
+    assert "\\end{table}" not in file.getvalue()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        pr.Exporter(io.StringIO(), "csv")
+    with pytest.raises(ValueError):
+        list(pr.Exporter.load(io.StringIO(), "latex"))
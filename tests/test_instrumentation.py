@@ -0,0 +1,101 @@
+import pytest
+import sympy as sym
+
+import prolongations as pr
+from prolongations.util import instrumentation
+
+
+@pr.instrument("square")
+def square(expr):
+    return expr**2
+
+
+@pr.instrument("outer", argument=1)
+def outer(label, expr):
+    return square(expr) + 1
+
+
+def test_disabled():
+    x = sym.Symbol("x")
+    assert instrumentation._recorder is None
+    assert square(x) == x**2
+
+
+def test_stats():
+    x = sym.Symbol("x")
+    with pr.instrumentation() as recorder:
+        outer("label", x + 1)
+        outer("label", x)
+    assert set(recorder.stats) == {"outer", "square"}
+    assert recorder.stats["outer"]["calls"] == 2
+    assert recorder.stats["square"]["calls"] == 2
+    # The sizes are measured on the positional argument with the given index
+    assert recorder.stats["outer"]["in"]["terms"] == 3
+    assert recorder.stats["outer"]["max_in"]["terms"] == 2
+    # Times are inclusive
+    assert recorder.stats["outer"]["time"] >= recorder.stats["square"]["time"]
+    assert recorder.summary().splitlines()[1].startswith("outer")
+
+
+def test_nested_contexts_restore_the_previous_recorder():
+    x = sym.Symbol("x")
+    with pr.instrumentation() as first:
+        square(x)
+        with pr.instrumentation() as second:
+            square(x)
+            square(x)
+        square(x)
+        with pytest.raises(RuntimeError):
+            with pr.instrumentation():
+                raise RuntimeError
+        square(x)
+    assert instrumentation._recorder is None
+    assert first.stats["square"]["calls"] == 3
+    assert second.stats["square"]["calls"] == 2
+
+
+def test_callback():
+    x = sym.Symbol("x")
+    records = []
+    with pr.instrumentation(lambda name, record: records.append((name, record))):
+        outer("label", x + 1)
+    assert [name for name, _ in records] == ["square", "outer"]
+    name, record = records[1]
+    assert record["time"] >= 0
+    assert record["in"] == pr.expression_size(x + 1)
+    assert record["out"] == pr.expression_size((x + 1) ** 2 + 1)
+
+
+def test_without_sizes(monkeypatch):
+    def measure(expr):
+        raise AssertionError("The expression was measured")
+
+    monkeypatch.setattr(instrumentation, "expression_size", measure)
+    records = []
+    with pr.instrumentation(lambda name, record: records.append(record), sizes=False) as r:
+        square(sym.Symbol("x"))
+    assert r.stats["square"]["calls"] == 1 and r.stats["square"]["in"] == dict()
+    assert records[0]["in"] == records[0]["out"] == dict()
+
+
+def test_expression_size():
+    x, y = sym.symbols("x y")
+    assert pr.expression_size(x * y + x) == {"count_ops": 2, "terms": 2, "depth": 3}
+    assert pr.expression_size({"u_x": x, "u_xx": x * y}) == {
+        "count_ops": 1,
+        "terms": 2,
+        "depth": 2,
+    }
+    assert pr.expression_size("x") == dict()
+
+
+def test_pipeline_stages():
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function("u")(x, t)])
+    jet = prolongation.jet
+    heat = pr.Equation(sym.Eq(jet.symbol([1], 0), jet.symbol([0, 0], 0)), jet)
+    with pr.instrumentation() as recorder:
+        prolongation.determining_equations(heat)
+    stages = {"determining_equations", "compute_system_coefficients", "substitute"}
+    assert stages <= set(recorder.stats)
+    assert recorder.stats["determining_equations"]["calls"] == 1
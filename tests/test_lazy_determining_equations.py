@@ -0,0 +1,103 @@
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+def collected(prolongation: pr.Prolongation, condition) -> dict:
+    """
+    The nonzero coefficients of the expanded condition, keyed by monomial names.
+    """
+    generators = prolongation.jet.generators(condition)
+    monomials = dict()
+    for exponents, coefficient in prolongation.collect_monomials(condition).items():
+        coefficient = sym.expand(coefficient)
+        if coefficient != 0:
+            monomials[prolongation._monomial_name(generators, exponents)] = coefficient
+    return monomials
+
+
+@pytest.fixture
+def burgers():
+    """
+    The prolongation and the lazy determining equations of u_t = u_xx + u * u_x.
+    """
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function("u")(x, t)])
+    jet = prolongation.jet
+    u, u_x = jet.jet(0, (0, 0)), jet.symbol([0], 0)
+    rhs = jet.symbol([0, 0], 0) + u * u_x
+    equation = pr.Equation(sym.Eq(jet.symbol([1], 0), rhs), jet)
+    return prolongation, prolongation.lazy_determining_equations(equation)
+
+
+def test_coefficient_of(burgers):
+    prolongation, result = burgers
+    condition = result.condition
+    generators = prolongation.jet.generators(condition)
+    expected = prolongation.collect_monomials(condition, generators)
+    for exponents, coefficient in expected.items():
+        name = prolongation._monomial_name(generators, exponents)
+        product = sym.Mul(*[g**exp for g, exp in zip(generators, exponents)])
+        for monomial in (exponents, name, product):
+            extracted = prolongation.coefficient_of(condition, monomial, generators)
+            assert sym.expand(extracted - coefficient) == 0, monomial
+
+
+def test_constant_term(burgers):
+    prolongation, result = burgers
+    expected = collected(prolongation, result.condition)
+    assert "" in expected
+    assert sym.expand(prolongation.coefficient_of(result.condition, "") - expected[""]) == 0
+    assert sym.expand(result[""] - expected[""]) == 0
+
+
+def test_absent_monomials(burgers):
+    prolongation, result = burgers
+    jet = prolongation.jet
+    u_xxx = jet.symbol([0, 0, 0], 0)
+    assert u_xxx in result.generators()
+    # A power that does not occur, and a jet symbol that does not occur at all
+    for monomial in ("u_xxx^3", u_xxx**3, jet.symbol([1, 1], 0)):
+        assert prolongation.coefficient_of(result.condition, monomial) == 0
+        assert result.coefficient(monomial) == 0
+    assert "u_xxx^3" not in result.monomials
+
+
+def test_items_match_collected(burgers):
+    prolongation, result = burgers
+    expected = collected(prolongation, result.condition)
+    items = dict(result.items())
+    assert items.keys() == expected.keys()
+    assert all(sym.expand(items[key] - expected[key]) == 0 for key in expected)
+    assert set(result.monomials) == set(expected)
+
+    # The support may contain monomials that cancel, but no others are missing
+    generators = result.generators()
+    support = {prolongation._monomial_name(generators, e) for e in result.support()}
+    assert set(expected) <= support
+
+
+def test_system():
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function(u)(x, t) for u in "uv"])
+    jet = prolongation.jet
+    u_x, u_t = jet.symbol([0], 0), jet.symbol([1], 0)
+    v_x, v_t = jet.symbol([0], 1), jet.symbol([1], 1)
+    # The right hand side of the second equation has terms without derivatives
+    system = [
+        pr.Equation(sym.Eq(u_t, v_x), jet),
+        pr.Equation(sym.Eq(v_t, u_x - jet.jet(0, (0, 0)) ** 2), jet),
+    ]
+    result = prolongation.lazy_determining_equations(system)
+    expected = {
+        (k, name): coefficient
+        for k, condition in enumerate(result.conditions())
+        for name, coefficient in collected(prolongation, condition).items()
+    }
+    items = dict(result.items())
+    assert items.keys() == expected.keys()
+    assert {k for k, _ in items} == {0, 1}
+    assert all(sym.expand(items[key] - expected[key]) == 0 for key in expected)
+    for key in expected:
+        assert sym.expand(result[key] - expected[key]) == 0
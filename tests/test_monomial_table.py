@@ -0,0 +1,116 @@
+import io
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+@pytest.fixture(scope="module")
+def burgers():
+    """
+    The prolongation and the symmetry condition of u_t = u_xx + u * u_x.
+    """
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function("u")(x, t)])
+    jet = prolongation.jet
+    u, u_x = jet.jet(0, (0, 0)), jet.symbol([0], 0)
+    rhs = jet.symbol([0, 0], 0) + u * u_x
+    equation = pr.Equation(sym.Eq(jet.symbol([1], 0), rhs), jet)
+    return prolongation, prolongation.lazy_determining_equations(equation).condition
+
+
+def same(a: dict, b: dict) -> bool:
+    return a.keys() == b.keys() and all(sym.expand(a[k] - b[k]) == 0 for k in a)
+
+
+@pytest.mark.parametrize("expand", [False, True])
+def test_matches_get_monomials(burgers, expand):
+    prolongation, condition = burgers
+    table = prolongation.get_monomial_table(condition, expand)
+    assert len(table) > 0
+    assert same(table.to_dict(), prolongation.get_monomials(condition, expand))
+
+
+def test_merge(burgers):
+    prolongation, condition = burgers
+    jet = prolongation.jet
+    generators = jet.generators(condition)
+    summands = sym.Add.make_args(condition)
+    half = len(summands) // 2
+    tables = [
+        pr.MonomialTable.from_collected(
+            jet, generators, prolongation.collect_monomials(sym.Add(*part), generators)
+        )
+        for part in (summands[:half], summands[half:])
+    ]
+    full = pr.MonomialTable.from_collected(
+        jet, generators, prolongation.collect_monomials(condition, generators)
+    )
+    assert same(tables[0].merge(tables[1]).to_dict(), full.to_dict())
+
+    negated = pr.MonomialTable.from_monomials(
+        jet, {key: -coefficient for key, coefficient in full.items()}
+    )
+    assert len(full.merge(negated)) == 0
+
+
+def test_filter(burgers):
+    prolongation, condition = burgers
+    table = prolongation.get_monomial_table(condition)
+    keys = list(table)
+    filtered = table.filter(lambda key, coefficient: key != "")
+    assert "" not in filtered and len(filtered) == len(table) - ("" in table)
+
+    # Adding to the filtered table leaves the source table alone, including its interned
+    # exponent tuples
+    exponents = dict(table._exponents)
+    u_x = prolongation.jet.symbol([0], 0)
+    filtered.add({u_x: 7}, sym.Symbol("c"))
+    assert filtered["u_x^7"] == sym.Symbol("c")
+    assert table._exponents == exponents
+    u_xxx = prolongation.jet.symbol([0, 0, 0], 0)
+    filtered.add({u_xxx: 3}, sym.Symbol("c"))
+    assert filtered["u_xxx^3"] == sym.Symbol("c")
+    assert list(table) == keys
+    assert all(table[key] == table.to_dict()[key] for key in keys)
+
+
+@pytest.mark.parametrize("method", ["share", "cse"])
+def test_compact(burgers, method):
+    prolongation, condition = burgers
+    jet = prolongation.jet
+    generators = jet.generators(condition)
+    collected = prolongation.collect_monomials(condition, generators)
+    table = pr.MonomialTable.from_collected(jet, generators, collected)
+    expected = table.to_dict()
+    table.compact(method)
+    assert (method == "cse") == (len(table.common) > 0)
+    assert table.to_dict() == expected
+
+
+def test_compact_unknown_method(burgers):
+    prolongation, condition = burgers
+    with pytest.raises(ValueError):
+        prolongation.get_monomial_table(condition).compact("zip")
+
+
+def test_system_keys(burgers):
+    prolongation, _ = burgers
+    jet = prolongation.jet
+    u_x = jet.symbol([0], 0)
+    table = pr.MonomialTable.from_collected(jet, (u_x,), {(1,): sym.Symbol("c")}, 1)
+    assert list(table) == [(1, "u_x")]
+    assert table[(1, "u_x")] == sym.Symbol("c")
+    assert (0, "u_x") not in table
+
+
+@pytest.mark.parametrize("format", ["json", "srepr", "pickle"])
+def test_export_load(burgers, format):
+    prolongation, condition = burgers
+    table = prolongation.get_monomial_table(condition)
+    file = io.BytesIO() if format == "pickle" else io.StringIO()
+    assert table.export(file, format) == len(table)
+    file.seek(0)
+    loaded = pr.MonomialTable.load(prolongation.jet, file, format)
+    assert loaded.to_dict() == table.to_dict()
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+def multi_indices(dimension: int, order: int):
+    for k in range(1, order + 1):
+        yield from map(list, itertools.combinations_with_replacement(range(dimension), k))
+
+
+def prolongation(permutations: bool = True) -> pr.Prolongation:
+    x, y, t = sym.symbols("x y t")
+    return pr.Prolongation([x, y, t], [sym.Function("u")(x, y, t)], permutations=permutations)
+
+
+def canonical(result: pr.DeterminingEquations) -> set:
+    return {sym.expand(coefficient) for coefficient in result.monomials.values()}
+
+
+@pytest.fixture(scope="module")
+def reference():
+    derivatives = list(multi_indices(3, 3))
+    return derivatives, prolongation(permutations=False).compute_vector_field_coefficients(
+        derivatives, 0
+    )
+
+
+def test_relabeling_matches_direct_computation(reference):
+    derivatives, expected = reference
+    coefficients = prolongation().compute_vector_field_coefficients(derivatives, 0)
+    for derivative, phi, phi_expected in zip(derivatives, coefficients, expected):
+        assert sym.expand(phi - phi_expected) == 0, derivative
+
+
+def test_relabeling_with_workers(reference):
+    derivatives, expected = reference
+    coefficients = prolongation().compute_vector_field_coefficients(derivatives, 0, workers=2)
+    for derivative, phi, phi_expected in zip(derivatives, coefficients, expected):
+        assert sym.expand(phi - phi_expected) == 0, derivative
+
+
+def test_representative():
+    p = prolongation()
+    assert p._representative((1, 2, 2)) == ((0, 0, 1), (2, 1, 0))
+    assert p._representative((0, 1)) == ((0, 1), (0, 1, 2))
+    assert prolongation(permutations=False)._representative((1, 2, 2)) \
+        == ((1, 2, 2), (0, 1, 2))
+
+
+def test_determining_equations_agree():
+    monomials = []
+    for permutations in (True, False):
+        p = prolongation(permutations)
+        u_t = p.jet.symbol([2], 0)
+        laplace = p.jet.symbol([0, 0], 0) + p.jet.symbol([1, 1], 0)
+        monomials.append(p.determining_equations(pr.Equation(sym.Eq(u_t, laplace), p.jet)))
+    assert canonical(monomials[0]) == canonical(monomials[1])
+
+
+def test_workers_schedule_the_parents(monkeypatch):
+    p = prolongation()
+    calls = []
+    simplify = pr.Prolongation._simplify
+
+    def count(self, phi):
+        calls.append(phi)
+        return simplify(self, phi)
+
+    # The workers inherit the patch, but count in their own copy of calls
+    monkeypatch.setattr(pr.Prolongation, "_simplify", count)
+    p.compute_vector_field_coefficients([[0, 1, 1], [2, 1, 2, 0]], 0, workers=2)
+    assert calls == []
+    assert sorted(key for _, key in p._coefficients) == [
+        (), (0,), (0, 0), (0, 0, 1), (0, 0, 1, 2), (0, 1, 1), (0, 1, 2, 2)
+    ]
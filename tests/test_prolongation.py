@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+def from_scratch(prolongation: pr.Prolongation, derivative: list[int], alpha: int):
+    """
+    phi^J = D_J (phi - sum_i xi^i u_i) + sum_i xi^i u_{J,i}, without the recursion.
+    """
+    jet = prolongation.jet
+    xs = prolongation.independent_variables
+    characteristic = prolongation.phi[alpha] - sym.Add(
+        *[xi * jet.symbol([i], alpha) for i, xi in enumerate(prolongation.xi)]
+    )
+    for i in derivative:
+        characteristic = jet.total_derivative(characteristic, xs[i])
+    return characteristic + sym.Add(*[
+        xi * jet.symbol(list(derivative) + [i], alpha) for i, xi in enumerate(prolongation.xi)
+    ])
+
+
+def multi_indices(dimension: int, order: int):
+    for k in range(1, order + 1):
+        yield from itertools.combinations_with_replacement(range(dimension), k)
+
+
+@pytest.mark.parametrize("names, dependent, order", [
+    ("x t", ["u"], 4),
+    ("x y t", ["u"], 3),
+    ("x t", ["u", "v"], 3),
+])
+def test_recursion_matches_formula(names, dependent, order):
+    xs = list(sym.symbols(names))
+    prolongation = pr.Prolongation(xs, [sym.Function(u)(*xs) for u in dependent])
+    for alpha in range(len(dependent)):
+        for derivative in multi_indices(len(xs), order):
+            phi = prolongation.compute_vector_field_coefficient(list(derivative), alpha)
+            expected = from_scratch(prolongation, list(derivative), alpha)
+            assert sym.expand(phi - expected) == 0, derivative
+
+
+def test_coefficient_independent_of_derivative_order():
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function("u")(x, t)])
+    assert prolongation.compute_vector_field_coefficient([0, 1, 0], 0) \
+        == prolongation.compute_vector_field_coefficient([1, 0, 0], 0)
+
+
+@pytest.mark.parametrize("simplify", [None, "expand", "collect"])
+def test_simplification_strategies_agree(simplify):
+    x, t = sym.symbols("x t")
+    u = sym.Function("u")(x, t)
+    reference = pr.Prolongation([x, t], [u])
+    prolongation = pr.Prolongation([x, t], [u], simplify=simplify)
+    for derivative in ([0], [0, 0], [0, 1], [0, 0, 0]):
+        phi = prolongation.compute_vector_field_coefficient(derivative, 0)
+        assert sym.expand(phi - reference.compute_vector_field_coefficient(derivative, 0)) == 0
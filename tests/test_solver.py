@@ -0,0 +1,85 @@
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+
+def algebra(rhs, degree: int) -> tuple:
+    """
+    The prolongation and the polynomial symmetry generators of u_t = rhs(u, u_x, u_xx).
+    """
+    x, t = sym.symbols("x t")
+    prolongation = pr.Prolongation([x, t], [sym.Function("u")(x, t)])
+    jet = prolongation.jet
+    u, u_x, u_xx = jet.jet(0, (0, 0)), jet.symbol([0], 0), jet.symbol([0, 0], 0)
+    equation = pr.Equation(sym.Eq(jet.symbol([1], 0), rhs(u, u_x, u_xx)), jet)
+    result = prolongation.determining_equations(equation)
+    return prolongation, pr.Solver(prolongation, result.monomials).generators(degree)
+
+
+def spans(prolongation: pr.Prolongation, generators: list[dict], expected: list) -> bool:
+    """
+    Check whether the generators span the expected (xi^x, xi^t, phi) triples, through the rank
+    of their polynomial coefficients in (x, t, u).
+    """
+    functions = [*prolongation.xi, *prolongation.phi]
+    base = prolongation._base_coordinates()
+    vectors = [[generator[f] for f in functions] for generator in generators]
+    expected = [[sym.sympify(e).subs(dict(zip(sym.symbols("x t u"), base))) for e in vector]
+                for vector in expected]
+
+    keys = sorted({(k, m) for vector in vectors + expected for k, e in enumerate(vector)
+                   for m in sym.Poly(e, *base).as_dict()})
+
+    def matrix(rows):
+        return sym.Matrix([[sym.Poly(row[k], *base).as_dict().get(m, 0) for k, m in keys]
+                           for row in rows])
+
+    return matrix(vectors).rank() == matrix(vectors + expected).rank()
+
+
+@pytest.fixture(scope="module")
+def heat():
+    return algebra(lambda u, u_x, u_xx: u_xx, 3)
+
+
+def test_heat_equation(heat):
+    prolongation, generators = heat
+    assert len(generators) == 10
+    assert spans(prolongation, generators, [
+        (1, 0, 0), (0, 1, 0), (0, 0, "u"),
+        ("x", "2*t", 0),
+        ("2*t", 0, "-x*u"),
+        ("4*x*t", "4*t**2", "-(x**2 + 2*t)*u"),
+        # Solutions of the heat equation, the infinite dimensional part
+        (0, 0, 1), (0, 0, "x"), (0, 0, "x**2 + 2*t"), (0, 0, "x**3 + 6*x*t"),
+    ])
+    assert not spans(prolongation, generators, [("x", "t", 0)])
+
+
+def test_heat_equation_degree_2():
+    prolongation, generators = algebra(lambda u, u_x, u_xx: u_xx, 2)
+    assert len(generators) == 8
+    assert not spans(prolongation, generators, [("4*x*t", "4*t**2", "-(x**2 + 2*t)*u")])
+
+
+def test_burgers_equation():
+    prolongation, generators = algebra(lambda u, u_x, u_xx: u_xx + u * u_x, 2)
+    assert len(generators) == 5
+    assert spans(prolongation, generators, [
+        (1, 0, 0), (0, 1, 0),
+        ("t", 0, -1),
+        ("x", "2*t", "-u"),
+        ("x*t", "t**2", "-x - t*u"),
+    ])
+
+
+def test_porous_medium_equation():
+    # (u u_x)_x, the reduced equations have rational coefficients such as xi^x_t/u
+    prolongation, generators = algebra(lambda u, u_x, u_xx: u * u_xx + u_x**2, 2)
+    assert len(generators) == 4
+    assert spans(prolongation, generators, [
+        (1, 0, 0), (0, 1, 0),
+        ("x", "2*t", 0),
+        ("x", 0, "2*u"),
+    ])
@@ -0,0 +1,53 @@
+import pytest
+import sympy as sym
+
+import prolongations as pr
+
+x, t = sym.symbols("x t")
+u = sym.Function("u")(x, t)
+u_x = sym.Function("u_x")(x, t)
+
+
+@pytest.mark.parametrize("expr", [
+    u**3 * sym.sin(u) * x,
+    sym.exp(x * u) / (1 + u**2),
+    sym.sqrt(u) * sym.log(x),
+    (u + x)**5,
+    u * sym.cos(x) * sym.exp(u) * x**2,
+])
+def test_D_matches_diff(expr):
+    expected = sym.diff(expr, x).subs(sym.Derivative(u, x), u_x)
+    assert sym.simplify(pr.D(expr, x) - expected) == 0
+
+
+def test_D_of_coefficient_function():
+    xi = sym.Function("xi^x")(x, t, u)
+    expected = sym.Function("xi^x_x")(x, t, u) + u_x * sym.Function("xi^x_u")(x, t, u)
+    assert pr.D(xi, x) == expected
+    assert pr.D(xi, sym.Symbol("y")) == 0
+
+
+def test_jet_total_derivative_matches_diff():
+    prolongation = pr.Prolongation([x, t], [u])
+    jet = prolongation.jet
+    v, v_x, v_t, v_xx = (jet.symbol(d, 0) for d in ([], [0], [1], [0, 0]))
+    expr = v**2 * v_x * v_t + sym.sin(v_xx) * x + sym.exp(v) / (1 + v_t**2)
+
+    # Evaluate the jet symbols on a concrete function of (x, t)
+    concrete = sym.sin(x) * sym.exp(t) + x**2 * t
+    xs = prolongation.independent_variables
+
+    def evaluate(e):
+        symbols = [s for s in e.free_symbols if jet.order(s) >= 0]
+        derivatives = {}
+        for s in symbols:
+            _, counts = jet.key(s)
+            derivatives[s] = concrete
+            for x_i, c in zip(xs, counts):
+                derivatives[s] = sym.diff(derivatives[s], x_i, c)
+        return e.xreplace(derivatives)
+
+    for variable in xs:
+        difference = evaluate(jet.total_derivative(expr, variable)) \
+            - sym.diff(evaluate(expr), variable)
+        assert sym.simplify(difference) == 0